@@ -129,19 +129,54 @@ def get_eurostoxx50_universe():
     return df.head(50)  # force exactly 50
 
 
+def get_nasdaq_universe():
+    """Every NASDAQ-listed common stock from the NASDAQ Trader symbol directory."""
+    url = "https://www.nasdaqtrader.com/dynamic/SymDir/nasdaqlisted.txt"
+    headers = {"User-Agent": "Mozilla/5.0"}
+    r = requests.get(url, headers=headers, timeout=30)
+    df = pd.read_csv(StringIO(r.text), sep="|", dtype=str)
+    if "Symbol" not in df.columns:
+        raise RuntimeError("Could not parse NASDAQ symbol directory")
+
+    # Last row is "File Creation Time"; drop test issues and ETFs
+    df = df[(df["Test Issue"] == "N") & (df["ETF"] == "N")].copy()
+    df["Ticker"] = df["Symbol"].str.replace(".", "-", regex=False)
+    df["Name"] = df["Security Name"]
+    df["Sector"] = None
+
+    df = df.drop_duplicates(subset="Ticker")
+    return df[["Ticker", "Name", "Sector"]].reset_index(drop=True)
+
+
+def get_russell3000_universe():
+    """Russell 3000 constituents from the iShares IWV holdings file."""
+    url = ("https://www.ishares.com/us/products/239714/ishares-russell-3000-etf/"
+           "1467271812596.ajax?fileType=csv&fileName=IWV_holdings&dataType=fund")
+    headers = {"User-Agent": "Mozilla/5.0"}
+    r = requests.get(url, headers=headers, timeout=30)
+
+    # The holdings table starts after a short preamble of fund details
+    lines = r.text.splitlines()
+    start = next((i for i, line in enumerate(lines) if line.startswith("Ticker,")), None)
+    if start is None:
+        raise RuntimeError("Could not find Russell 3000 holdings table")
+    df = pd.read_csv(StringIO("\n".join(lines[start:])), dtype=str)
+    df = df[df["Asset Class"] == "Equity"].dropna(subset=["Ticker"]).copy()
+
+    df["Ticker"] = df["Ticker"].str.strip().str.replace(".", "-", regex=False)
+    df = df.drop_duplicates(subset="Ticker")
+    return df[["Ticker", "Name", "Sector"]].reset_index(drop=True)
+
+
 # ==========================================================
 # 2. YAHOO DOWNLOADER (600 days, batched)
 # ==========================================================
 
-def download_yahoo_prices(tickers, label, period="600d"):
-    print(f"\nDownloading {label}: {len(tickers)} tickers")
-    if not tickers:
-        return []
-
-    batch_size = 40
-    frames = []
-    failed = []
-
+def iter_yahoo_batches(tickers, label, period="600d", batch_size=40):
+    """
+    Yield (frames, failed) for each batch of `batch_size` tickers as soon
+    as that batch has downloaded and parsed.
+    """
     for i in range(0, len(tickers), batch_size):
         batch = tickers[i:i + batch_size]
         print(f"  Batch {i // batch_size + 1}: {len(batch)} tickers")
@@ -156,18 +191,31 @@ def download_yahoo_prices(tickers, label, period="600d"):
             )
         except Exception as e:
             print(f"  ERROR downloading batch: {e}")
-            failed.extend(batch)
+            yield [], list(batch)
             continue
 
+        frames = []
+        failed = []
         for t in batch:
             try:
-                df_t = data[t].dropna().copy()
-                df_t["Ticker"] = t
-                df_t["Index"] = label
-                frames.append(df_t.reset_index())
+                # copy-on-write: no per-ticker copy until a column is written
+                frames.append(data[t].dropna().reset_index().assign(Ticker=t, Index=label))
             except Exception as e:
                 print(f"  Failed to parse {t}: {e}")
                 failed.append(t)
+        yield frames, failed
+
+
+def download_yahoo_prices(tickers, label, period="600d"):
+    print(f"\nDownloading {label}: {len(tickers)} tickers")
+    if not tickers:
+        return []
+
+    frames = []
+    failed = []
+    for batch_frames, batch_failed in iter_yahoo_batches(tickers, label, period):
+        frames.extend(batch_frames)
+        failed.extend(batch_failed)
 
     print(f"Completed {label}: {len(frames)} OK, {len(failed)} failed")
     return frames
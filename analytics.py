@@ -0,0 +1,209 @@
+import argparse
+import glob
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+import store
+
+try:
+    import pyarrow  # noqa: F401  (pandas' much faster CSV engine)
+    CSV_ENGINE = "pyarrow"
+except ImportError:
+    CSV_ENGINE = "c"
+
+# ==========================================================
+# 1. LOADING
+# ==========================================================
+# Column layout the strategy backtests write
+TRADE_DTYPES = {
+    "days_to_close": "float64",
+    "ticker": "category",
+    "entry": "float64",
+    "target": "float64",
+    "stop": "float64",
+    "outcome": "category",
+    "gain_loss_pct": "float64",
+}
+TRADE_DATES = ["entry_date", "close_date"]
+TRADE_LOGS = "*_strategy_trades_*.csv"
+
+
+def _read_log(path):
+    # A blank file has no header to parse; the pyarrow engine reports that
+    # as a ParserError rather than EmptyDataError, so skip it up front
+    with open(path, "rb") as f:
+        if not any(line.strip() for line in f):
+            return None
+    try:
+        df = pd.read_csv(path, dtype=TRADE_DTYPES, engine=CSV_ENGINE)
+    except pd.errors.EmptyDataError:
+        return None
+    for col in TRADE_DATES:
+        df[col] = pd.to_datetime(df[col], utc=True, format="ISO8601").dt.as_unit("ns")
+    return df
+
+
+def load_trades(paths=TRADE_LOGS):
+    """
+    Trade logs as one columnar frame: tickers and outcomes as categoricals,
+    dates as UTC timestamps. `paths` is a file, a glob or a list of either.
+    Parsing the CSV dominates load time, so each parsed log is kept in the
+    store and only re-read when the file's size or mtime changes.
+    """
+    if isinstance(paths, str):
+        paths = [paths]
+    parts = []
+    for path in sorted({f for p in paths for f in glob.glob(p)}):
+        st = os.stat(path)
+        stamp = (st.st_size, st.st_mtime_ns)
+        name = f"trades/{os.path.basename(path)}"
+        cached = store.load(name, cache=False)
+        if cached is not None and cached[0] == stamp:
+            df = cached[1]
+        else:
+            df = _read_log(path)
+            store.save(name, (stamp, df), cache=False)
+        if df is not None and not df.empty:
+            parts.append(df)
+    if not parts:
+        return pd.DataFrame({c: pd.Series(dtype=t) for c, t in
+                             {**dict.fromkeys(TRADE_DATES, "datetime64[ns, UTC]"), **TRADE_DTYPES}.items()})
+    trades = pd.concat(parts, ignore_index=True)
+    for col in ("ticker", "outcome"):
+        trades[col] = trades[col].astype("category")
+    return trades
+
+
+# ==========================================================
+# 2. SUMMARIES
+# ==========================================================
+# Every breakdown is a handful of np.bincount passes over integer group
+# codes, which stays well under a second for millions of trades.
+def _grouped(trades, codes, labels):
+    n = len(labels)
+    pct = trades["gain_loss_pct"].to_numpy()
+    win = pct > 0
+    count = np.bincount(codes, minlength=n)
+    wins = np.bincount(codes, win, n)
+    win_sum = np.bincount(codes, np.where(win, pct, 0.0), n)
+    total = np.bincount(codes, pct, n)
+    days = np.bincount(codes, trades["days_to_close"].to_numpy(), n)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        out = pd.DataFrame({
+            "Trades": count,
+            "Win Rate %": wins / count * 100,
+            "Avg Win %": win_sum / wins,
+            "Avg Loss %": (total - win_sum) / (count - wins),
+            "Expectancy %": total / count,
+            "Total %": total,
+            "Avg Days": days / count,
+        }, index=labels)
+    return out[count > 0]
+
+
+def summarize(trades):
+    """Headline numbers for the whole log as a dict."""
+    out = _grouped(trades, np.zeros(len(trades), dtype=np.intp), [0])
+    out = out.iloc[0].to_dict() if len(out) else dict.fromkeys(out.columns, np.nan)
+    pct = trades["gain_loss_pct"].to_numpy()
+    gains, losses = pct[pct > 0].sum(), -pct[pct <= 0].sum()
+    out["Profit Factor"] = gains / losses if losses else (np.inf if gains else np.nan)
+    return out
+
+
+def by_ticker(trades):
+    codes = trades["ticker"].cat.codes.to_numpy()
+    keep = codes >= 0
+    out = _grouped(trades[keep], codes[keep].astype(np.intp),
+                   pd.Index(trades["ticker"].cat.categories, name="ticker"))
+    return out.sort_values("Total %", ascending=False)
+
+
+def by_month(trades):
+    """Breakdown by the (UTC) month a trade closed in."""
+    months = _ns(trades["close_date"]).view("datetime64[ns]").astype("datetime64[M]").astype(np.int64)
+    if not len(months):
+        return _grouped(trades, months.astype(np.intp), pd.PeriodIndex([], freq="M", name="month"))
+    # datetime64[M] and monthly Period ordinals both count months from 1970-01
+    first = months.min()
+    labels = pd.period_range(pd.Period(ordinal=int(first), freq="M"),
+                             periods=int(months.max() - first) + 1, name="month")
+    return _grouped(trades, (months - first).astype(np.intp), labels)
+
+
+# ==========================================================
+# 3. POSITIONS AND EQUITY
+# ==========================================================
+def _ns(col):
+    # int64 view of a UTC timestamp column (to_numpy() would box Timestamps)
+    return pd.DatetimeIndex(col).asi8
+
+
+def _utc(ns):
+    return pd.DatetimeIndex(ns, tz="UTC", name="time")
+
+
+def concurrent_positions(trades):
+    """
+    Open position count after every entry/exit, as a Series indexed by
+    time. Exits at the same instant as entries are applied first.
+    """
+    # Pack (time, is_entry) into one int64 so a plain sort orders exits
+    # before entries at equal times
+    events = np.concatenate([_ns(trades["close_date"]) << 1, (_ns(trades["entry_date"]) << 1) | 1])
+    events.sort()
+    count = np.cumsum((events & 1) * 2 - 1)
+    return pd.Series(count, index=_utc(events >> 1), name="Open Positions")
+
+
+def equity_curve(trades, start=100.0, position_size=0.1):
+    """
+    Equity realised at each close with a fixed stake of `position_size` x
+    `start` per trade (no compounding, so long logs stay comparable).
+    Returns a frame with Equity and Drawdown % indexed by close time.
+    """
+    closes = _ns(trades["close_date"])
+    order = np.argsort(closes)
+    pnl = trades["gain_loss_pct"].to_numpy()[order] / 100 * position_size * start
+    equity = start + np.cumsum(pnl)
+    peak = np.maximum.accumulate(np.concatenate([[start], equity]))[1:]
+    return pd.DataFrame({"Equity": equity, "Drawdown %": (equity / peak - 1) * 100},
+                        index=_utc(closes[order]))
+
+
+def report(trades):
+    """Everything the dashboard tab shows, computed once."""
+    equity = equity_curve(trades)
+    positions = concurrent_positions(trades)
+    summary = summarize(trades)
+    summary["Max Drawdown %"] = equity["Drawdown %"].min() if len(equity) else 0.0
+    summary["Max Concurrent"] = int(positions.max()) if len(positions) else 0
+    return {
+        "summary": summary,
+        "by_ticker": by_ticker(trades),
+        "by_month": by_month(trades),
+        "positions": positions,
+        "equity": equity,
+    }
+
+
+# ==========================================================
+# 4. COMMAND LINE
+# ==========================================================
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Summarize strategy trade logs")
+    parser.add_argument("paths", nargs="*", default=[TRADE_LOGS])
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    trades = load_trades(args.paths)
+    t1 = time.perf_counter()
+    result = report(trades)
+    t2 = time.perf_counter()
+    print(f"{len(trades):,} trades loaded in {t1 - t0:.2f}s, summarized in {t2 - t1:.2f}s")
+    for name, value in result["summary"].items():
+        print(f"  {name:15s} {value:,.2f}")
+    print(result["by_month"].round(2).to_string())
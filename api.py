@@ -0,0 +1,209 @@
+import argparse
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlparse
+
+import pandas as pd
+
+import bars
+import pyramid
+import signal_table
+import store
+
+try:
+    import pyarrow as pa
+except ImportError:   # Arrow responses are optional
+    pa = None
+
+# ==========================================================
+# 1. WHAT IS SERVED
+# ==========================================================
+# Everything comes from the store the scheduler keeps up to date; nothing
+# here downloads or scans.
+TIMEFRAMES = {
+    "weekly": ("Weekly", "market_data"),
+    "daily": ("Daily", "daily_data"),
+    "hourly": ("Hourly", "hourly_data"),
+}
+
+CACHE_SIZE = 512
+
+
+class ApiError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+# ==========================================================
+# 2. QUERIES
+# ==========================================================
+def _one(query, name, default=None):
+    values = query.get(name)
+    return values[0] if values else default
+
+
+def _timeframe(query, default=None):
+    tf = (_one(query, "timeframe", default) or "").lower()
+    if tf and tf not in TIMEFRAMES:
+        raise ApiError(400, f"unknown timeframe {tf!r}; use one of {', '.join(TIMEFRAMES)}")
+    return tf
+
+
+def query_signals(query):
+    """Latest VALID signals, optionally filtered by timeframe, index and sector."""
+    signals = store.load("signals") or {}
+    tf = _timeframe(query)
+    parts = []
+    for name, (category, _) in TIMEFRAMES.items():
+        df = signals.get(category)
+        if (tf and name != tf) or df is None or df.empty:
+            continue
+        parts.append(df.assign(Timeframe=name))
+    if not parts:
+        return pd.DataFrame()
+    out = signal_table.with_universe_info(pd.concat(parts, ignore_index=True))
+    for col in ("index", "sector"):
+        want = _one(query, col)
+        if want is not None:
+            if col.title() not in out:
+                raise ApiError(400, f"no {col} data in the store yet")
+            out = out[out[col.title()].astype(str).str.lower() == want.lower()]
+    return out.reset_index(drop=True)
+
+
+_index_lock = threading.Lock()
+_ticker_index = {}   # timeframe -> (base store version, {ticker: (start, end)})
+
+
+def _bar_timeframe(query):
+    tf = _one(query, "timeframe", "daily").lower()
+    try:
+        return pyramid.resolve(tf)
+    except KeyError as e:
+        raise ApiError(400, e.args[0])
+
+
+def query_bars(ticker, query):
+    """One ticker's bars in any pyramid timeframe (1h, 2h, 4h, 1d, 2d, 1w, 1mo)."""
+    tf = _bar_timeframe(query)
+    version = store.version(pyramid.TIMEFRAMES[tf][0])
+    df = pyramid.get(tf)
+    if df is None:
+        raise ApiError(404, f"no {tf} bars in the store yet")
+
+    # Bar sets and pyramid levels are sorted by ticker; index each version once
+    with _index_lock:
+        hit = _ticker_index.get(tf)
+        if hit is None or hit[0] != version:
+            hit = (version, bars.ticker_ranges(df["Ticker"].to_numpy()))
+            _ticker_index[tf] = hit
+    if ticker not in hit[1]:
+        raise ApiError(404, f"unknown ticker {ticker!r}")
+    s, e = hit[1][ticker]
+    return df.iloc[s:e].reset_index(drop=True)
+
+
+# ==========================================================
+# 3. ENCODING AND RESPONSE CACHE
+# ==========================================================
+def encode(df, fmt):
+    if fmt == "arrow":
+        if pa is None:
+            raise ApiError(406, "Arrow output needs pyarrow installed")
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return sink.getvalue().to_pybytes(), "application/vnd.apache.arrow.stream"
+    body = df.to_json(orient="records", date_format="iso")
+    return body.encode(), "application/json"
+
+
+_cache_lock = threading.Lock()
+_responses = OrderedDict()   # (path, query, store versions) -> (etag, body, content type)
+
+
+def respond(path, query):
+    """(etag, body, content type) for a request, built at most once per store version."""
+    if path == "/signals":
+        deps = ("signals", "universes")
+    elif path.startswith("/bars/"):
+        deps = (pyramid.TIMEFRAMES[_bar_timeframe(query)][0],)
+    else:
+        raise ApiError(404, f"no route {path}")
+    fmt = _one(query, "format", "json")
+    if fmt not in ("json", "arrow"):
+        raise ApiError(400, "format must be json or arrow")
+
+    key = (path, tuple(sorted((k, tuple(v)) for k, v in query.items())),
+           tuple(store.version(d) for d in deps))
+    with _cache_lock:
+        if key in _responses:
+            _responses.move_to_end(key)
+            return _responses[key]
+
+    df = query_signals(query) if path == "/signals" else query_bars(unquote(path[len("/bars/"):]), query)
+    body, ctype = encode(df, fmt)
+    etag = '"' + hashlib.blake2b(body, digest_size=12).hexdigest() + '"'
+    with _cache_lock:
+        _responses[key] = (etag, body, ctype)
+        while len(_responses) > CACHE_SIZE:
+            _responses.popitem(last=False)
+    return etag, body, ctype
+
+
+# ==========================================================
+# 4. HTTP SERVER
+# ==========================================================
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == "/health":
+            return self._send(200, b'{"status": "ok"}', "application/json")
+        try:
+            etag, body, ctype = respond(url.path, parse_qs(url.query))
+        except ApiError as e:
+            return self._send(e.status, json.dumps({"error": str(e)}).encode(), "application/json")
+        except Exception as e:
+            # a store read or encoding failure still gets an answer, not a dropped connection
+            print(f"[api] GET {self.path} failed: {e!r}")
+            return self._send(500, json.dumps({"error": "internal error"}).encode(), "application/json")
+
+        if etag in [t.strip() for t in self.headers.get("If-None-Match", "").split(",")]:
+            return self._send(304, b"", None, etag)
+        self._send(200, body, ctype, etag)
+
+    def _send(self, status, body, ctype, etag=None):
+        self.send_response(status)
+        if ctype:
+            self.send_header("Content-Type", ctype)
+        if etag:
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", "no-cache")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, fmt, *args):
+        pass   # keep the console quiet at hundreds of requests per second
+
+
+def serve(host="127.0.0.1", port=8050):
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    print(f"Serving signals on http://{host}:{port} (/signals, /bars/<ticker>, /health)")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve precomputed signals and bars")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8050)
+    args = parser.parse_args()
+    serve(args.host, args.port)
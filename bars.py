@@ -0,0 +1,171 @@
+import pandas as pd
+import numpy as np
+
+import store
+
+# ==========================================================
+# 1. SORTED ARRAYS AND RANGE INDEXES
+# ==========================================================
+def load_arrays(df, time_col, extra=()):
+    """
+    Sort once by (Ticker, time) and pull out the columns every timeframe
+    needs, plus a range index: ticker -> (start, end) rows in those arrays.
+    `extra` columns are carried along under their own names. Normalized
+    frames (sessions.normalize) sort on their integer "ts" column. Frames
+    already in that order, as everything in the store is, are not sorted
+    again, so their numeric columns come out as views of the store data.
+    """
+    key = "ts" if "ts" in df else time_col
+    tickers = df["Ticker"].to_numpy()
+    if not _is_sorted(tickers, df[key].to_numpy()):
+        df = df.sort_values(["Ticker", key], kind="stable")
+        tickers = df["Ticker"].to_numpy()
+    arrays = {
+        "time": df[time_col].to_numpy(),
+        "open": df["Open"].to_numpy(dtype=float),
+        "high": df["High"].to_numpy(dtype=float),
+        "low": df["Low"].to_numpy(dtype=float),
+        "close": df["Close"].to_numpy(dtype=float),
+        "volume": df["Volume"].to_numpy(dtype=float),
+    }
+    for col in extra:
+        arrays[col] = df[col].to_numpy()
+    store.count_copies([*arrays.values(), tickers])
+    return arrays, ticker_ranges(tickers)
+
+
+def _is_sorted(tickers, times):
+    """True when rows are grouped by ascending ticker, in time order within each."""
+    if len(tickers) < 2:
+        return True
+    change = tickers[1:] != tickers[:-1]
+    firsts = tickers[np.r_[True, change]]
+    try:
+        return bool((firsts[1:] > firsts[:-1]).all() and ((times[1:] >= times[:-1]) | change).all())
+    except TypeError:   # unorderable values (NaN tickers, mixed types): let the sort decide
+        return False
+
+
+def ticker_slice(df, ticker):
+    """
+    Rows of `ticker` in a frame sorted by Ticker (store bar sets, pyramid
+    levels) as a positional slice, which shares the frame's data.
+    """
+    col = df["Ticker"]
+    return df.iloc[col.searchsorted(ticker, "left"):col.searchsorted(ticker, "right")]
+
+
+def ticker_ranges(tickers):
+    """Row range of each ticker in an array already sorted by ticker."""
+    if len(tickers) == 0:
+        return {}
+    starts = np.flatnonzero(np.r_[True, tickers[1:] != tickers[:-1]])
+    ends = np.r_[starts[1:], len(tickers)]
+    return {tickers[s]: (s, e) for s, e in zip(starts, ends)}
+
+
+# ==========================================================
+# 2. BUCKET KEYS
+# ==========================================================
+# A bucket key is an int64 per bar that only grows with time within a
+# ticker; consecutive bars with the same key form one aggregated bar.
+_DAY_NS = 86_400 * 10**9
+
+
+def wall_clock_ns(times):
+    """Exchange-local wall-clock time of each bar as int64 ns."""
+    try:
+        idx = pd.DatetimeIndex(times)
+    except (TypeError, ValueError):
+        # bars of several exchanges keep their own time zones (object dtype)
+        return np.array([pd.Timestamp(t).tz_localize(None).value for t in times], dtype=np.int64)
+    if idx.tz is not None:
+        idx = idx.tz_localize(None)   # resample buckets by exchange-local date
+    return idx.as_unit("ns").asi8
+
+
+def week_keys(times, ranges=None):
+    """W-FRI weeks, keyed by the Friday's day number."""
+    days = wall_clock_ns(times) // _DAY_NS
+    # 1970-01-01 was a Thursday: weekday = (days + 3) % 7, Friday = 4
+    return days + (4 - (days + 3) % 7) % 7
+
+
+def month_keys(times, ranges=None):
+    """Calendar months, keyed by months since 1970-01."""
+    return (wall_clock_ns(times) // _DAY_NS).astype("datetime64[D]").astype("datetime64[M]").astype(np.int64)
+
+
+def day_keys(n):
+    """Calendar `n`-day buckets counted from 1970-01-01, so they never shift."""
+    def keys(times, ranges=None):
+        return wall_clock_ns(times) // _DAY_NS // n
+    return keys
+
+
+def intraday_keys(hours):
+    """
+    `hours`-hour buckets within each session day, anchored on the ticker's
+    first bar of that day (09:30, 11:30, ... for a 09:30 open).
+    """
+    def keys(times, ranges):
+        wall = wall_clock_ns(times)
+        if len(wall) == 0:
+            return wall
+        day = wall // _DAY_NS
+        rows = np.arange(len(wall))
+        new_day = np.r_[True, day[1:] != day[:-1]]
+        new_day[[s for s, _ in ranges.values()]] = True
+        day_start = np.maximum.accumulate(np.where(new_day, rows, 0))
+        slot = (wall - wall[day_start]) // (hours * 3_600 * 10**9)
+        return day * 100 + slot
+    return keys
+
+
+# ==========================================================
+# 3. AGGREGATION
+# ==========================================================
+def aggregate_arrays(base, ranges, keys):
+    """
+    OHLCV bars of every run of equal `keys` within a ticker, from sorted
+    base arrays. Buckets are contiguous runs of rows, so one reduceat per
+    column aggregates every ticker at once. Returns (arrays, ranges,
+    bucket start rows, bucket end rows); "time" is the first bar's time.
+    """
+    lengths = [e - s for s, e in ranges.values()]
+    ticker_id = np.repeat(np.arange(len(lengths)), lengths)
+    if len(ticker_id) == 0:
+        empty = np.array([], dtype=np.int64)
+        return {k: v[:0] for k, v in base.items()}, {}, empty, empty
+    new_bucket = np.r_[True, (keys[1:] != keys[:-1]) | (ticker_id[1:] != ticker_id[:-1])]
+    starts = np.flatnonzero(new_bucket)
+    ends = np.r_[starts[1:], len(keys)]
+
+    out = {
+        "time": base["time"][starts],
+        "open": base["open"][starts],
+        "high": np.maximum.reduceat(base["high"], starts),
+        "low": np.minimum.reduceat(base["low"], starts),
+        "close": base["close"][ends - 1],
+        "volume": np.add.reduceat(base["volume"], starts),
+    }
+    names = np.array(list(ranges), dtype=object)
+    return out, ticker_ranges(names[ticker_id[starts]]), starts, ends
+
+
+def weekly_arrays(daily, ranges):
+    """
+    W-FRI weekly bars built straight from the sorted daily arrays, matching
+    scanner.resample_weekly (bars are labelled with the week's Friday).
+    """
+    keys = week_keys(daily["time"])
+    weekly, w_ranges, starts, _ = aggregate_arrays(daily, ranges, keys)
+    weekly["time"] = keys[starts].astype("datetime64[D]").astype("datetime64[ns]")
+    return weekly, w_ranges
+
+
+def reduce_ranges(ufunc, values, starts, ends):
+    """`ufunc.reduce(values[s:e])` for every non-empty (s, e) pair in one call."""
+    idx = np.column_stack([starts, ends]).ravel()
+    padded = np.append(values, values[:1])   # lets an end equal to len(values) index
+    return ufunc.reduceat(padded, idx)[::2]
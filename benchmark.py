@@ -0,0 +1,674 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+import bars
+import pipeline
+import pyramid
+import scanner
+import store
+
+# ==========================================================
+# 1. SETTINGS
+# ==========================================================
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_baseline.json")
+
+# Floats match when np.isclose(engine, reference, rtol=RTOL, atol=ATOL)
+RTOL = 1e-9
+ATOL = 1e-12
+
+# An engine fails when its speedup drops below its baseline by more than this
+SPEED_TOLERANCE = 0.25
+
+# Median of at least MIN_RUNS timed runs, repeated until MIN_TIME seconds
+# are spent, per engine and dataset; a single 50 ms run is too noisy to gate
+# on. Engine and reference runs alternate, so load on the machine slows
+# both sides of a speedup alike.
+MIN_RUNS = 5
+MIN_TIME = 1.5
+
+SYNTHETIC_TICKERS = 400
+SYNTHETIC_SEED = 7
+
+
+# ==========================================================
+# 2. DATASETS
+# ==========================================================
+# Every dataset is {bar set key: frame}. "recorded" is whatever bars the
+# store holds; the synthetic sets are regenerated from a fixed seed, with
+# a retrace into the fib zone planted in half the tickers so every scanner
+# has VALID rows to disagree on.
+def _planted_path(rng, n):
+    """Rally, retrace to a random depth around the 0.618–0.786 zone, then drift."""
+    up, down = rng.integers(n // 6, n // 3), rng.integers(n // 20, n // 8)
+    flat = rng.integers(3, max(4, n // 25))
+    start = n - up - down - flat
+    low, high = 1.0, 1.0 + rng.uniform(0.3, 1.0)
+    depth = rng.uniform(0.55, 0.85)
+    bottom = high - depth * (high - low)
+    path = np.concatenate([
+        np.full(start, low),
+        np.linspace(low, high, up),
+        np.linspace(high, bottom, down),
+        bottom * (1 + np.linspace(0, rng.uniform(-0.01, 0.05), flat)),
+    ])
+    return path * (1 + rng.normal(0, 0.004, n).cumsum() * 0.2)
+
+
+def _synthetic_frame(rng, times, time_col, tick=None):
+    n = len(times)
+    frames = []
+    for i in range(SYNTHETIC_TICKERS):
+        base = _planted_path(rng, n) if i % 2 == 0 else np.exp(rng.normal(0, 0.02, n).cumsum())
+        close = 50 * base
+        spread = np.abs(rng.normal(0, 0.01, n)) * close
+        high, low = close + spread, close - spread
+        if tick is not None:   # coarse prices: equal highs and lows everywhere
+            close, high, low = (np.round(x / tick) * tick for x in (close, high, low))
+        keep = n if i % 10 else rng.integers(n // 3, n)   # some short histories
+        frames.append(pd.DataFrame({
+            time_col: times[-keep:], "Open": close[-keep:], "High": high[-keep:],
+            "Low": low[-keep:], "Close": close[-keep:], "Adj Close": close[-keep:],
+            "Volume": rng.integers(10_000, 1_000_000, keep).astype(float),
+            "Ticker": f"S{i:04d}",
+        }))
+    return pd.concat(frames, ignore_index=True)
+
+
+def synthetic(tick=None):
+    rng = np.random.default_rng(SYNTHETIC_SEED)
+    days = pd.bdate_range(end="2025-06-30", periods=600)
+    hours = pd.DatetimeIndex([d + pd.Timedelta(hours=h, minutes=30)
+                              for d in days[-60:] for h in range(9, 16)])
+    daily = _synthetic_frame(rng, days, "Date", tick)
+    return {
+        "market_data": daily,
+        "daily_data": daily,
+        "hourly_data": _synthetic_frame(rng, hours, "Datetime", tick),
+    }
+
+
+def recorded():
+    """Bars currently in the store (None when the store is empty)."""
+    data = {key: store.load(key, cache=False) for key in pipeline.BAR_KEYS}
+    data = {key: df for key, df in data.items() if df is not None and not df.empty}
+    return data or None
+
+
+DATASETS = {
+    "recorded": recorded,
+    "synthetic": synthetic,
+    "synthetic-ties": lambda: synthetic(tick=0.5),
+}
+
+
+# ==========================================================
+# 3. REFERENCES AND ENGINES
+# ==========================================================
+# Scanner -> (bar set, fields compared, reference, {engine: fn}). Each
+# function takes the bar frame ("weekly_bars" is market_data resampled
+# once, outside the timings) and returns one row per ticker (per
+# ROW_KEYS where a scan says otherwise); the reference is the plain
+# per-ticker pandas implementation every optimized engine must
+# reproduce. An engine may also be a (prepare, fn) pair:
+# prepare(df) runs untimed before every timed fn call and returns its
+# input. Engines run against an empty scratch store. Add new engines with
+# register().
+WEEKLY_FIELDS = ["Swing Low", "Swing High", "Swing High Date", "Fib618", "Fib786",
+                 "Retr Low", "Latest Price"]
+SWING_FIELDS = ["Swing Low", "Swing High", "Swing High Date", "Fib618", "Fib786",
+                "Retr Low", "Current Price"]
+FIND_SWING_FIELDS = ["Swing Low Date", "Swing Low Price", "Swing High Date", "Swing High Price"]
+
+
+def _valid(df):
+    return df if df.empty else df[df["Signal"] == "VALID"]
+
+
+def _per_ticker(df, fn):
+    rows = []
+    for ticker, g in df.groupby("Ticker"):
+        row = fn(g)
+        if row:
+            rows.append({**row, "Ticker": ticker})
+    return pd.DataFrame(rows)
+
+
+def _scanned_columns(df):
+    # pipeline renames two weekly columns for display
+    return df.rename(columns={"Current Price": "Latest Price", "Retrace Low": "Retr Low"})
+
+
+# The original pandas scanners, copied verbatim from before they became
+# wrappers over the array cores (scanner.find_swing_arrays,
+# scanner_*.detect_swing_arrays). They are the references: calling the
+# scanner modules instead would check the array code against itself.
+def find_swing_pandas(group, lookback_weeks=80):
+    window = group.tail(lookback_weeks)
+    if len(window) < 10:
+        return None
+    highs = window["High"].values
+    dates = window["Date"].values
+    look = 3
+    pivots = []
+    for i in range(look, len(highs) - look):
+        if highs[i] == max(highs[i - look : i + look + 1]):
+            pivots.append(i)
+    if not pivots:
+        return None
+    best_rel_idx = max(pivots, key=lambda idx: highs[idx])
+    swing_high_price = float(highs[best_rel_idx])
+    swing_high_date = pd.to_datetime(dates[best_rel_idx])
+    prior_segment = window.iloc[: best_rel_idx + 1]
+    low_idx = prior_segment["Low"].idxmin()
+    swing_low_price = float(group.loc[low_idx, "Low"])
+    swing_low_date = pd.to_datetime(group.loc[low_idx, "Date"])
+    if swing_low_price >= swing_high_price:
+        return None
+    return {
+        "Swing Low Date": swing_low_date,
+        "Swing Low Price": swing_low_price,
+        "Swing High Date": swing_high_date,
+        "Swing High Price": swing_high_price,
+    }
+
+
+def scan_weekly_pandas(df, lookback_weeks=80):
+    results = []
+    weekly = scanner.resample_weekly(df)
+    for ticker, g in weekly.groupby("Ticker"):
+        g = g.sort_values("Date").copy()
+        latest_price = g["Close"].iloc[-1]
+        latest_date = g["Date"].iloc[-1]
+        swing = find_swing_pandas(g, lookback_weeks)
+        if swing is None:
+            continue
+        swing_range = swing["Swing High Price"] - swing["Swing Low Price"]
+        fib618 = swing["Swing High Price"] - 0.618 * swing_range
+        fib786 = swing["Swing High Price"] - 0.786 * swing_range
+        correction = g[(g["Date"] > swing["Swing High Date"]) & (g["Date"] <= latest_date)]
+        if correction.empty:
+            continue
+        retr_idx = correction["Low"].idxmin()
+        retr_low_price = correction.loc[retr_idx, "Low"]
+        retr_low_date = correction.loc[retr_idx, "Date"]
+
+        # Condition 1: Fib zone
+        retr_in_zone = (retr_low_price <= fib618) and (retr_low_price >= fib786)
+
+        # Condition 2: retracement within last 8 weeks
+        weeks_since_retr = (latest_date - retr_low_date).days / 7
+        recent_hit = weeks_since_retr <= 8
+
+        # Final signal (RSI divergence removed, charting removed)
+        signal = "VALID" if retr_in_zone and recent_hit else "INVALID"
+
+        results.append({
+            "Ticker": ticker,
+            "Latest Date": latest_date,
+            "Latest Price": latest_price,
+            "Swing Low": swing["Swing Low Price"],
+            "Swing High": swing["Swing High Price"],
+            "Swing High Date": swing["Swing High Date"],
+            "Fib618": fib618,
+            "Fib786": fib786,
+            "Retr Low": retr_low_price,
+            "Retr Date": retr_low_date,
+            "Weeks Since Retr": weeks_since_retr,
+            "Recent Hit": recent_hit,
+            "Signal": signal
+        })
+    return pd.DataFrame(results)
+
+
+def detect_daily_pandas(df, lookback_days=250):
+    """
+    Identify latest swing high, swing low, retrace into 0.618–0.786 zone,
+    and check if current price is within +3% of retrace low.
+    """
+    df = df.sort_values("Date").reset_index(drop=True)
+
+    lows = df["Low"].to_numpy(dtype=float)
+    highs = df["High"].to_numpy(dtype=float)
+    closes = df["Close"].to_numpy(dtype=float)
+
+    if len(lows) < lookback_days:
+        return None
+
+    # Step 1: find recent swing low
+    recent_low_idx = np.argmin(lows[-lookback_days:])
+    recent_low_price = lows[-lookback_days:][recent_low_idx]
+    recent_low_pos = len(lows) - lookback_days + recent_low_idx
+
+    # Step 2: find swing high after that low
+    window_highs = highs[recent_low_pos:]
+    if len(window_highs) < 5:
+        return None
+    swing_high_idx = np.argmax(window_highs)
+    swing_high_price = window_highs[swing_high_idx]
+    swing_high_pos = recent_low_pos + swing_high_idx
+    swing_high_date = df["Date"].iloc[swing_high_pos]
+
+    # Step 3: Fibonacci retracement levels
+    fib618 = swing_high_price - 0.618 * (swing_high_price - recent_low_price)
+    fib786 = swing_high_price - 0.786 * (swing_high_price - recent_low_price)
+
+    # Step 4: retracement low after swing high
+    retr_segment = lows[swing_high_pos:]
+    if len(retr_segment) == 0:
+        return None
+    retr_low = retr_segment.min()
+    retr_low_pos = swing_high_pos + np.argmin(retr_segment)
+
+    retr_in_zone = fib786 <= retr_low <= fib618
+
+    # Step 5: current price check
+    current_price = closes[-1]
+    within_3pct = current_price <= retr_low * 1.03
+
+    if retr_in_zone and within_3pct:
+        return {
+            "Swing Low": recent_low_price,
+            "Swing High": swing_high_price,
+            "Swing High Date": swing_high_date,
+            "Fib618": fib618,
+            "Fib786": fib786,
+            "Retr Low": retr_low,
+            "Current Price": current_price,
+            "Signal": "VALID"
+        }
+    else:
+        return {
+            "Swing Low": recent_low_price,
+            "Swing High": swing_high_price,
+            "Swing High Date": swing_high_date,
+            "Fib618": fib618,
+            "Fib786": fib786,
+            "Retr Low": retr_low if retr_segment.size > 0 else None,
+            "Current Price": current_price,
+            "Signal": "INVALID"
+        }
+
+
+def detect_hourly_pandas(df, lookback_hours=120):
+    """
+    Identify latest swing high, swing low, retrace into 0.618–0.786 zone,
+    and check if current price is within +3% of retrace low.
+    """
+    df = df.sort_values("Datetime").reset_index(drop=True)
+
+    lows = df["Low"].to_numpy(dtype=float)
+    highs = df["High"].to_numpy(dtype=float)
+    closes = df["Close"].to_numpy(dtype=float)
+
+    if len(lows) < lookback_hours:
+        return None
+
+    # Step 1: find recent swing low
+    recent_low_idx = np.argmin(lows[-lookback_hours:])
+    recent_low_price = lows[-lookback_hours:][recent_low_idx]
+    recent_low_pos = len(lows) - lookback_hours + recent_low_idx
+
+    # Step 2: find swing high after that low
+    window_highs = highs[recent_low_pos:]
+    if len(window_highs) < 5:
+        return None
+    swing_high_idx = np.argmax(window_highs)
+    swing_high_price = window_highs[swing_high_idx]
+    swing_high_pos = recent_low_pos + swing_high_idx
+    swing_high_date = df["Datetime"].iloc[swing_high_pos]
+
+    # Step 3: Fibonacci retracement levels
+    fib618 = swing_high_price - 0.618 * (swing_high_price - recent_low_price)
+    fib786 = swing_high_price - 0.786 * (swing_high_price - recent_low_price)
+
+    # Step 4: retracement low after swing high
+    retr_segment = lows[swing_high_pos:]
+    if len(retr_segment) == 0:
+        return None
+    retr_low = retr_segment.min()
+    retr_low_pos = swing_high_pos + np.argmin(retr_segment)
+
+    retr_in_zone = fib786 <= retr_low <= fib618
+
+    # Step 5: current price check
+    current_price = closes[-1]
+    within_3pct = current_price <= retr_low * 1.03
+
+    if retr_in_zone and within_3pct:
+        return {
+            "Swing Low": recent_low_price,
+            "Swing High": swing_high_price,
+            "Swing High Date": swing_high_date,
+            "Fib618": fib618,
+            "Fib786": fib786,
+            "Retr Low": retr_low,
+            "Current Price": current_price,
+            "Signal": "VALID"
+        }
+    else:
+        return {
+            "Swing Low": recent_low_price,
+            "Swing High": swing_high_price,
+            "Swing High Date": swing_high_date,
+            "Fib618": fib618,
+            "Fib786": fib786,
+            "Retr Low": retr_low if retr_segment.size > 0 else None,
+            "Current Price": current_price,
+            "Signal": "INVALID"
+        }
+
+
+def find_swing_reference(weekly, lookback_weeks=80):
+    return _per_ticker(weekly, lambda g: find_swing_pandas(g.sort_values("Date"), lookback_weeks))
+
+
+def find_swing_arrays(weekly, lookback_weeks=80):
+    a, ranges = bars.load_arrays(weekly, "Date")
+    rows = []
+    for ticker, (s, e) in ranges.items():
+        row = scanner.find_swing_arrays(a["high"][s:e], a["low"][s:e], a["time"][s:e], lookback_weeks)
+        if row:
+            rows.append({**row, "Ticker": ticker})
+    return pd.DataFrame(rows)
+
+
+def _drop_last_bars(df, time_col, every=3):
+    """`df` without the last bar of every `every`-th ticker."""
+    last = (df[time_col] == df.groupby("Ticker")[time_col].transform("max")).to_numpy()
+    picked = df["Ticker"].isin(np.sort(df["Ticker"].unique())[::every]).to_numpy()
+    return df[~(last & picked)]
+
+
+def cached(key, warm, columns=lambda df: df):
+    """
+    (prepare, fn) scanning `key` bars through pipeline.cached_scan as
+    run_scanners does. Cold runs start from an empty cache; warm
+    runs find it filled from the same bars less every third ticker's last
+    bar, so they rescan the appended tickers and reuse every other row.
+    """
+    time_col = pipeline.BAR_KEYS[key]
+
+    def fn(df):
+        return columns(pipeline.cached_scan(key, df))
+
+    def prepare(df):
+        store.delete("scan_cache")
+        if warm:
+            fn(_drop_last_bars(df, time_col))
+        return df
+    return prepare, fn
+
+
+# Columns identifying a row of each scan's output (default: Ticker)
+ROW_KEYS = {}
+
+ENGINES = {
+    "find_swing": ("weekly_bars", FIND_SWING_FIELDS, find_swing_reference, {
+        "arrays": find_swing_arrays,
+    }),
+    "scan_weekly": ("market_data", WEEKLY_FIELDS, lambda df: _valid(scan_weekly_pandas(df)), {
+        "arrays": lambda df: _valid(scanner.scan_weekly(df)),
+        "pyramid": lambda df: _scanned_columns(pipeline.scan_weekly_valid(df, use_prefilter=False)),
+        "prefilter": lambda df: _scanned_columns(pipeline.scan_weekly_valid(df)),
+        "cache-cold": cached("market_data", False, _scanned_columns),
+        "cache-warm": cached("market_data", True, _scanned_columns),
+    }),
+    "detect_daily": ("daily_data", SWING_FIELDS, lambda df: _valid(
+        _per_ticker(df, detect_daily_pandas)), {
+        "prefilter": pipeline.scan_daily_valid,
+        "cache-cold": cached("daily_data", False),
+        "cache-warm": cached("daily_data", True),
+    }),
+    "detect_hourly": ("hourly_data", SWING_FIELDS, lambda df: _valid(
+        _per_ticker(df, detect_hourly_pandas)), {
+        "prefilter": pipeline.scan_hourly_valid,
+        "cache-cold": cached("hourly_data", False),
+        "cache-warm": cached("hourly_data", True),
+    }),
+}
+
+
+# Pyramid levels, one engine per cached timeframe: the level is first built
+# from bars that start earlier and end two bars sooner, so the timed
+# pyramid.get sees a moved history start (mid-session for hourly bars),
+# appended bars and its re-aggregated tail. Its rows, keyed by Ticker and
+# bar time, must match a plain aggregate of the same bars. "rebuild" times
+# pyramid.get without a stored level: the full aggregate plus writing the
+# level, which is what "incremental" has to beat.
+PYRAMID_FIELDS = ["Open", "High", "Low", "Close", "Adj Close", "Volume"]
+
+
+def _trim_start(df, time_col, n=3):
+    """`df` without its first `n` bar times."""
+    return df[df[time_col] >= np.sort(df[time_col].unique())[n]]
+
+
+def incremental(tf):
+    """(prepare, fn) bringing a stale, differently-started level up to date."""
+    base_key, time_col, _ = pyramid.TIMEFRAMES[tf]
+
+    def prepare(df):
+        store.delete(f"pyramid/{tf}/state")
+        store.save(base_key, df[df[time_col] < np.sort(df[time_col].unique())[-2]])
+        pyramid.get(tf)
+        store.save(base_key, _trim_start(df, time_col))
+        return df
+
+    return prepare, lambda df: pyramid.get(tf)
+
+
+def rebuild(tf):
+    """(prepare, fn) building a level from scratch through the store."""
+    base_key, time_col, _ = pyramid.TIMEFRAMES[tf]
+
+    def prepare(df):
+        store.delete(f"pyramid/{tf}/state")
+        store.save(base_key, _trim_start(df, time_col))
+        return df
+
+    return prepare, lambda df: pyramid.get(tf)
+
+
+for _tf, (_base, _time_col, _key_fn) in pyramid.TIMEFRAMES.items():
+    if _key_fn is not None:
+        ENGINES[f"pyramid_{_tf}"] = (
+            _base, PYRAMID_FIELDS,
+            lambda df, tf=_tf, col=_time_col: pyramid.aggregate(_trim_start(df, col), tf),
+            {"incremental": incremental(_tf), "rebuild": rebuild(_tf)})
+        ROW_KEYS[f"pyramid_{_tf}"] = ["Ticker", _time_col]
+
+
+def register(scan, name, fn):
+    """Add an engine (fn or (prepare, fn)) to check against `scan`'s reference."""
+    ENGINES[scan][3][name] = fn
+
+
+# ==========================================================
+# 4. EQUIVALENCE
+# ==========================================================
+def diff(reference, result, fields, keys=("Ticker",)):
+    """
+    Differences between two tables keyed by `keys` (one row per ticker by
+    default) as a list of strings: rows only one side has, then every
+    field outside tolerance.
+    """
+    keys = list(keys)
+    ref = reference.set_index(keys) if not reference.empty else pd.DataFrame(columns=fields)
+    out = result.set_index(keys) if not result.empty else pd.DataFrame(columns=fields)
+    problems = [f"missing {t}" for t in sorted(set(ref.index) - set(out.index))]
+    problems += [f"extra {t}" for t in sorted(set(out.index) - set(ref.index))]
+
+    common = ref.index.intersection(out.index)
+    for field in fields:
+        if len(common) == 0:
+            break
+        if field not in out:
+            problems.append(f"no column {field!r}")
+            continue
+        a, b = ref.loc[common, field], out.loc[common, field]
+        if pd.api.types.is_numeric_dtype(a) and pd.api.types.is_numeric_dtype(b):
+            x, y = a.to_numpy(dtype=float), b.to_numpy(dtype=float)
+            same = np.isclose(x, y, rtol=RTOL, atol=ATOL) | (np.isnan(x) & np.isnan(y))
+        else:
+            x, y = pd.to_datetime(a).to_numpy(), pd.to_datetime(b).to_numpy()
+            same = (x == y) | (pd.isna(x) & pd.isna(y))
+        for row in common[~same]:
+            problems.append(f"{row} {field}: {ref.at[row, field]!r} != {out.at[row, field]!r}")
+    return problems
+
+
+# ==========================================================
+# 5. TIMING AND BASELINE
+# ==========================================================
+def _time_once(fn, df, prepare=None):
+    with contextlib.redirect_stdout(io.StringIO()):   # progress prints are swallowed
+        arg = df if prepare is None else prepare(df)
+        t0 = time.perf_counter()
+        result = fn(arg)
+        return result, time.perf_counter() - t0
+
+
+def _enough(seconds):
+    return len(seconds) >= MIN_RUNS and sum(seconds) >= MIN_TIME
+
+
+def timed(fn, df, prepare=None):
+    """(result, median wall time of MIN_RUNS or more runs)."""
+    seconds, result = [], None
+    while not _enough(seconds):
+        result, t = _time_once(fn, df, prepare)
+        seconds.append(t)
+    return result, float(np.median(seconds))
+
+
+def timed_against(reference, fn, df, prepare=None):
+    """
+    (engine result, reference median, engine median) from runs of the
+    two taken in turn until each side has had enough.
+    """
+    ref_seconds, seconds, result = [], [], None
+    while not (_enough(ref_seconds) and _enough(seconds)):
+        ref_seconds.append(_time_once(reference, df)[1])
+        result, t = _time_once(fn, df, prepare)
+        seconds.append(t)
+    return result, float(np.median(ref_seconds)), float(np.median(seconds))
+
+
+def load_baseline(path=BASELINE_FILE):
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_baseline(results, path=BASELINE_FILE):
+    baseline = load_baseline(path)
+    for r in results:
+        if r["equivalent"]:
+            baseline[r["key"]] = {"speedup": round(r["speedup"], 3),
+                                  "seconds": round(r["seconds"], 4),
+                                  "reference_seconds": round(r["reference_seconds"], 4)}
+    with open(path, "w") as f:
+        json.dump(dict(sorted(baseline.items())), f, indent=2)
+        f.write("\n")
+
+
+# ==========================================================
+# 6. RUN
+# ==========================================================
+@contextlib.contextmanager
+def scratch_store():
+    """Point the store at an empty temporary directory, so engines that
+    cache (scan_cache, pyramid) neither see nor overwrite the real one."""
+    saved = store.STORE_DIR
+    with tempfile.TemporaryDirectory() as tmp:
+        store.STORE_DIR = tmp
+        try:
+            yield tmp
+        finally:
+            store.STORE_DIR = saved
+
+
+def run(scans=None, datasets=None, baseline=None):
+    """
+    Check every engine of `scans` against its reference on `datasets`.
+    Speedups are compared as ratios to the reference timed in the same run,
+    so a baseline recorded on one machine stays meaningful on another.
+    Returns one result dict per (scan, engine, dataset).
+    """
+    baseline = load_baseline() if baseline is None else baseline
+    results = []
+    for ds_name in datasets or DATASETS:
+        data = DATASETS[ds_name]()
+        if data is None:
+            print(f"[benchmark] {ds_name}: no bars, skipped")
+            continue
+        if "market_data" in data:
+            data["weekly_bars"] = scanner.resample_weekly(data["market_data"])
+        with scratch_store():
+            results += _run_dataset(ds_name, data, scans, baseline)
+    return results
+
+
+def _run_dataset(ds_name, data, scans, baseline):
+    results = []
+    for scan in scans or ENGINES:
+        key, fields, reference, engines = ENGINES[scan]
+        df = data.get(key)
+        if df is None:
+            continue
+        ref, ref_time = _time_once(reference, df)
+        print(f"[benchmark] {ds_name} / {scan}: reference {ref_time:.3f}s, "
+              f"{len(ref)} rows from {df['Ticker'].nunique()} tickers")
+        for name, engine in engines.items():
+            prepare, fn = engine if isinstance(engine, tuple) else (None, engine)
+            out, ref_seconds, seconds = timed_against(reference, fn, df, prepare)
+            problems = diff(ref, out, fields, ROW_KEYS.get(scan, ["Ticker"]))
+            r = {"key": f"{scan}/{name}/{ds_name}", "equivalent": not problems,
+                 "problems": problems, "seconds": seconds,
+                 "reference_seconds": ref_seconds, "speedup": ref_seconds / seconds}
+            recorded_speedup = baseline.get(r["key"], {}).get("speedup")
+            r["slower"] = (recorded_speedup is not None and
+                           r["speedup"] < recorded_speedup * (1 - SPEED_TOLERANCE))
+            results.append(r)
+            _report(r, recorded_speedup)
+    return results
+
+
+def _report(r, recorded_speedup):
+    status = "OK" if r["equivalent"] and not r["slower"] else "FAIL"
+    vs = f" (baseline {recorded_speedup:.2f}x)" if recorded_speedup is not None else " (no baseline)"
+    print(f"  {status:4s} {r['key']:40s} {r['seconds']:.3f}s  {r['speedup']:6.2f}x{vs}")
+    for p in r["problems"][:10]:
+        print(f"       {p}")
+    if len(r["problems"]) > 10:
+        print(f"       ... {len(r['problems']) - 10} more differences")
+    if r["slower"]:
+        print(f"       slower than baseline by more than {SPEED_TOLERANCE:.0%}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check optimized scan engines against the reference scanners")
+    parser.add_argument("--scans", nargs="+", choices=list(ENGINES))
+    parser.add_argument("--datasets", nargs="+", choices=list(DATASETS))
+    parser.add_argument("--record", action="store_true",
+                        help=f"write equivalent engines' speedups to {os.path.basename(BASELINE_FILE)}")
+    args = parser.parse_args()
+
+    results = run(args.scans, args.datasets)
+    if args.record:
+        save_baseline(results)
+        print(f"[benchmark] baseline written to {BASELINE_FILE}")
+    failed = [r["key"] for r in results if not r["equivalent"] or r["slower"]]
+    print(f"[benchmark] {len(results) - len(failed)} of {len(results)} engine runs passed")
+    if failed:
+        sys.exit(1)
@@ -0,0 +1,117 @@
+import argparse
+import gc
+import resource
+import time
+
+import pandas as pd
+
+import pipeline
+import ranking
+import scheduler
+import store
+
+# ==========================================================
+# 1. SETTINGS
+# ==========================================================
+CHUNK_SIZE = 200
+
+
+# ==========================================================
+# 2. MEMORY ACCOUNTING
+# ==========================================================
+def rss_mb():
+    """Current resident set size in MB (Linux /proc; None elsewhere)."""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * resource.getpagesize() / 2**20
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def peak_rss_mb():
+    # ru_maxrss is KB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+# ==========================================================
+# 3. CHUNKED DOWNLOAD -> STORE -> SCAN
+# ==========================================================
+def run_chunked(tickers, label, keys=tuple(pipeline.BAR_KEYS), chunk_size=CHUNK_SIZE):
+    """
+    Stream a large universe through download -> store -> scan `chunk_size`
+    tickers at a time. Each chunk's bars are written to the store as their
+    own partition ("chunks/<bar set>/<label>-<n>") and dropped before the
+    next chunk, so peak memory follows the chunk size, not the universe
+    size. Only VALID rows are kept; returns {category: VALID rows}, ranked
+    across the whole universe.
+    """
+    for key in keys:
+        for name in _partitions(key, label):
+            store.delete(name)   # stale partitions of an earlier run
+
+    valid = {pipeline.SCANS[key][0]: [] for key in keys}
+    n_chunks = (len(tickers) + chunk_size - 1) // chunk_size
+
+    for n, i in enumerate(range(0, len(tickers), chunk_size)):
+        chunk = tickers[i:i + chunk_size]
+        t0 = time.perf_counter()
+        rows = 0
+        for key in keys:
+            download, period = pipeline.DOWNLOADS[key]
+            frames = download(chunk, label, period=period)
+            if not frames:
+                continue
+            bars = pipeline.merge_frames(frames, pipeline.BAR_KEYS[key])
+            del frames
+            rows += len(bars)
+            store.save(f"chunks/{key}/{label}-{n:04d}", bars, cache=False)
+
+            category, scan = pipeline.SCANS[key]
+            found = scan(bars)
+            if not found.empty:
+                valid[category].append(found)
+            del bars
+        gc.collect()
+
+        secs = time.perf_counter() - t0
+        print(f"[chunk {n + 1}/{n_chunks}] {len(chunk)} tickers, {rows} bars in {secs:.1f}s "
+              f"({len(chunk) / secs:.1f} tickers/s, {rows / secs:,.0f} bars/s) | "
+              f"RSS {rss_mb() or float('nan'):.0f} MB, peak {peak_rss_mb():.0f} MB")
+
+    return {category: ranking.rank(pd.concat(parts, ignore_index=True) if parts else pd.DataFrame())
+            for category, parts in valid.items()}
+
+
+def _partitions(key, label):
+    return [name for name in store.names(f"chunks/{key}")
+            if name.rsplit("/", 1)[1].startswith(f"{label}-")]
+
+
+def iter_chunks(key, label):
+    """Read back the stored partitions of one bar set, one chunk at a time."""
+    for name in _partitions(key, label):
+        yield store.load(name, cache=False)
+
+
+# ==========================================================
+# 4. COMMAND LINE
+# ==========================================================
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Chunked scan of a large universe")
+    parser.add_argument("--universe", default="NASDAQ", choices=sorted(scheduler.UNIVERSE_BUILDERS))
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--bars", nargs="+", default=list(pipeline.BAR_KEYS),
+                        choices=list(pipeline.BAR_KEYS))
+    args = parser.parse_args()
+
+    universe = scheduler.get_universe(args.universe)
+    print(f"{args.universe}: {len(universe)} tickers")
+    t0 = time.perf_counter()
+    results = run_chunked(universe["Ticker"].tolist(), args.universe,
+                          keys=args.bars, chunk_size=args.chunk_size)
+    print(f"\nDone in {time.perf_counter() - t0:.1f}s, peak RSS {peak_rss_mb():.0f} MB")
+
+    for category, df in results.items():
+        print(f"{category}: {len(df)} VALID")
+        df.to_excel(f"{args.universe.lower()}_{category.lower()}_signals.xlsx", index=False)
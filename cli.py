@@ -0,0 +1,180 @@
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+
+import pipeline
+import scheduler
+import signal_diff
+import store
+
+# ==========================================================
+# 1. SETTINGS
+# ==========================================================
+TIMEFRAME_KEYS = {"weekly": "market_data", "daily": "daily_data", "hourly": "hourly_data"}
+
+# History re-downloaded by --incremental for tickers already in the store
+INCREMENTAL_PERIODS = {"market_data": "10d", "daily_data": "10d", "hourly_data": "5d"}
+
+# Same file names the per-scanner scripts have always exported
+EXPORT_NAMES = {"Weekly": "valid_signals", "Daily": "daily_signals", "Hourly": "hourly_signals"}
+
+timings = {}
+copies = {}   # stage -> bytes copied in memory (store.copy_counter)
+
+
+@contextmanager
+def stage(name):
+    t0 = time.perf_counter()
+    with store.copy_counter() as copied:
+        try:
+            yield
+        finally:
+            timings[name] = timings.get(name, 0.0) + time.perf_counter() - t0
+            copies[name] = copies.get(name, 0) + copied["bytes"]
+
+
+# ==========================================================
+# 2. DOWNLOAD (shared across timeframes)
+# ==========================================================
+def bar_sets_for(timeframes):
+    """
+    Bar sets needed for `timeframes`. The weekly scan only looks at its last
+    80 weeks, which the 730d daily history already covers, so a run that
+    wants both weekly and daily downloads daily bars once and scans them
+    for both.
+    """
+    keys = {TIMEFRAME_KEYS[tf] for tf in timeframes}
+    if {"market_data", "daily_data"} <= keys:
+        keys.discard("market_data")
+    return [k for k in pipeline.BAR_KEYS if k in keys]
+
+
+def download(key, label, tickers, incremental):
+    """Frames for one (bar set, universe); incremental runs top up stored tickers."""
+    fetch, period = pipeline.DOWNLOADS[key]
+    if not incremental:
+        return fetch(tickers, label, period=period)
+
+    stored = store.load(key)
+    known = set() if stored is None else set(stored.loc[stored["Index"] == label, "Ticker"])
+    old = [t for t in tickers if t in known]
+    new = [t for t in tickers if t not in known]
+    frames = fetch(old, label, period=INCREMENTAL_PERIODS[key]) if old else []
+    if new:
+        frames += fetch(new, label, period=period)
+    return frames
+
+
+def load_bars(keys, universes, jobs, incremental):
+    tasks = [(key, label) for key in keys for label in universes]
+    with stage("universes"):
+        tickers = {label: scheduler.get_universe(label)["Ticker"].tolist() for label in universes}
+    args = ([k for k, _ in tasks], [l for _, l in tasks],
+            [tickers[l] for _, l in tasks], [incremental] * len(tasks))
+    with stage("download"):
+        if jobs > 1 and len(tasks) > 1:
+            # yf.download keeps module-global state, so parallel downloads
+            # run in separate processes rather than threads
+            with ProcessPoolExecutor(max_workers=jobs) as ex:
+                frames = list(ex.map(download, *args))
+        else:
+            frames = list(map(download, *args))
+        # every parsed bar arrives as a fresh in-memory frame
+        for frame in (frame for f in frames for frame in f):
+            store.count_copies(frame)
+
+    with stage("parse"):
+        merged = {task: pipeline.merge_frames(f, pipeline.BAR_KEYS[task[0]])
+                  for task, f in zip(tasks, frames) if f}
+        del frames
+        for df in merged.values():
+            store.count_copies(df)
+
+    bar_sets = {}
+    with stage("store"):
+        for (key, label), df in merged.items():
+            time_col = pipeline.BAR_KEYS[key]
+            if incremental:
+                # top-ups only add bars: trim back to the full download's window
+                store.append_rows(key, df, time_col, period=pipeline.DOWNLOADS[key][1])
+            else:
+                store.replace_universe(key, label, [df], time_col)
+        for key in keys:
+            df = store.load(key)
+            if df is not None:
+                keep = df["Index"].isin(universes).to_numpy()
+                if keep.all():   # the usual case keeps the mapped frame itself
+                    bar_sets[key] = df
+                else:
+                    bar_sets[key] = df[keep]
+                    store.count_copies(bar_sets[key])
+    all_tickers = set().union(*map(set, tickers.values())) if tickers else set()
+    return bar_sets, all_tickers
+
+
+# ==========================================================
+# 3. SCAN + EXPORT
+# ==========================================================
+def run(timeframes, universes, jobs=4, incremental=False, fmt="xlsx", out_dir="."):
+    timings.clear()
+    copies.clear()
+    keys = bar_sets_for(timeframes)
+    bar_sets, tickers = load_bars(keys, universes, jobs, incremental)
+    if "weekly" in timeframes and "market_data" not in bar_sets and "daily_data" in bar_sets:
+        bar_sets["market_data"] = bar_sets["daily_data"]
+
+    results = {}
+    for tf in timeframes:
+        key = TIMEFRAME_KEYS[tf]
+        if key not in bar_sets:
+            print(f"No {tf} bars downloaded; skipping")
+            continue
+        with stage(f"scan {tf}"):
+            results.update(pipeline.run_scanners({key: bar_sets[key]}, use_cache=incremental))
+
+    with stage("record"):
+        signal_diff.record_partial_run(results, tickers)
+    with stage("export"):
+        os.makedirs(out_dir, exist_ok=True)
+        for category, df in results.items():
+            path = os.path.join(out_dir, f"{EXPORT_NAMES[category]}.{fmt}")
+            if fmt == "xlsx":
+                df.to_excel(path, index=False)
+            elif fmt == "csv":
+                df.to_csv(path, index=False)
+            else:
+                df.to_json(path, orient="records", date_format="iso")
+            print(f"Exported {len(df)} {category} VALID signals to {path}")
+    return results
+
+
+def print_timings():
+    total = sum(timings.values())
+    print("\nStage timings (and MB copied into process memory)")
+    for name, secs in timings.items():
+        print(f"  {name:14s} {secs:8.2f}s  {secs / total * 100 if total else 0:5.1f}%"
+              f"  {copies.get(name, 0) / 2**20:9.1f} MB")
+    print(f"  {'total':14s} {total:8.2f}s         {sum(copies.values()) / 2**20:9.1f} MB")
+
+
+# ==========================================================
+# 4. COMMAND LINE
+# ==========================================================
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Download once and run every scanner")
+    parser.add_argument("--timeframes", nargs="+", default=list(TIMEFRAME_KEYS),
+                        choices=list(TIMEFRAME_KEYS))
+    parser.add_argument("--universes", nargs="+", default=list(scheduler.SESSIONS),
+                        choices=list(scheduler.UNIVERSE_BUILDERS))
+    parser.add_argument("--jobs", type=int, default=4, help="parallel downloads")
+    parser.add_argument("--incremental", action="store_true",
+                        help="top up stored bars and rescan only changed tickers")
+    parser.add_argument("--format", dest="fmt", default="xlsx", choices=["xlsx", "csv", "json"])
+    parser.add_argument("--out-dir", default=".")
+    args = parser.parse_args()
+
+    run(args.timeframes, args.universes, jobs=args.jobs, incremental=args.incremental,
+        fmt=args.fmt, out_dir=args.out_dir)
+    print_timings()
@@ -1,17 +1,24 @@
+import glob
+import os
+
 import streamlit as st
 import pandas as pd
 import plotly.graph_objects as go
 
 # ==========================================================
-# 1. IMPORT UPDATERS AND SCANNERS
+# 1. IMPORT STORE, SCHEDULER AND SCANNERS
 # ==========================================================
-from Updater import load_all_market_data        # capital U
-from updater_hourly import load_all_hourly_data
-from updater_daily import load_all_daily_data
-
-import scanner
-import scanner_hourly
-import scanner_daily
+import analytics
+import bars
+import store
+import scheduler
+import pipeline
+import pyramid
+import ranking
+import scan_cache
+import signal_diff
+import signal_table
+import streaming
 
 # ==========================================================
 # 2. STREAMLIT CONFIG
@@ -20,116 +27,208 @@ st.set_page_config(page_title="Trading Dashboard", layout="wide")
 st.title("📊 Trading Dashboard")
 
 # ==========================================================
-# 3. REFRESH DATA
+# 3. BACKGROUND REFRESH
 # ==========================================================
+# The scheduler downloads, scans and prewarms the store after every bar
+# close; the dashboard only reads what it has already computed.
+@st.cache_resource
+def start_scheduler():
+    return scheduler.start_background()
+
+start_scheduler()
+
 if st.sidebar.button("🔄 Refresh Data", key="refresh_button"):
-    st.session_state["market_data"] = load_all_market_data()
-    st.session_state["hourly_data"] = load_all_hourly_data()
-    st.session_state["daily_data"] = load_all_daily_data()
-    st.success("Data refreshed!")
+    scheduler.request_refresh()
+    st.success("Refresh queued — results update when the background job finishes.")
+
+if st.sidebar.button("⚡ Live Refresh", key="live_refresh_button"):
+    # Scan each download batch as it lands and show VALID rows right away
+    st.subheader("Live refresh")
+    progress = st.empty()
+    tables = {category: st.empty() for category, _ in pipeline.SCANS.values()}
+    found = {category: [] for category in tables}
+    for event in streaming.stream_and_store():
+        progress.caption(f"{event['universe']} {event['category']} batch {event['batch'] + 1}")
+        if not event["valid"].empty:
+            found[event["category"]].append(event["valid"])
+            tables[event["category"]].dataframe(
+                ranking.rank(pd.concat(found[event["category"]], ignore_index=True)))
+    progress.empty()
+    st.success("Live refresh complete!")
+
+sched = scheduler.status()
+st.sidebar.caption(f"Scheduler {'running' if sched['running'] else 'stopped'}, "
+                   f"{sched['pending']} job(s) pending")
+
+for key in pipeline.BAR_KEYS:
+    stored = store.load(key)
+    if stored is not None:
+        st.session_state[key] = stored
 
 # ==========================================================
 # 4. RUN SCANNERS
 # ==========================================================
 def run_scanners():
-    results = {}
-
-    # Weekly scanner
-    if "market_data" in st.session_state:
-        df = st.session_state["market_data"]
-        signals = scanner.scan_weekly(df)
-        valid = signals[signals["Signal"] == "VALID"]
-
-        if not valid.empty:
-            valid = valid.rename(columns={"Latest Price": "Current Price",
-                                          "Retr Low": "Retrace Low"})
-            # Add stock name lookup (Ticker → Company Name)
-            # Example mapping; replace with your own dictionary or data source
-            ticker_to_name = {
-                "AAPL": "Apple Inc.",
-                "MSFT": "Microsoft Corporation",
-                "GOOGL": "Alphabet Inc.",
-                # add more tickers here...
-            }
-            valid["Stock Name"] = valid["Ticker"].map(ticker_to_name).fillna("Unknown")
-
-            # Reorder columns
-            valid = valid[["Ticker", "Stock Name", "Current Price",
-                           "Swing High", "Swing Low", "Fib618", "Fib786", "Retrace Low"]]
-
-        results["Weekly"] = valid
-
-    # Hourly scanner
-    if "hourly_data" in st.session_state:
-        df = st.session_state["hourly_data"]
-        signals = []
-        for ticker, g in df.groupby("Ticker"):
-            sig = scanner_hourly.detect_swing_and_retrace(g)
-            if sig and sig["Signal"] == "VALID":
-                sig["Ticker"] = ticker
-                signals.append(sig)
-        results["Hourly"] = pd.DataFrame(signals)
-
-    # Daily scanner
-    if "daily_data" in st.session_state:
-        df = st.session_state["daily_data"]
-        signals = []
-        for ticker, g in df.groupby("Ticker"):
-            sig = scanner_daily.detect_swing_and_retrace(g)
-            if sig and sig["Signal"] == "VALID":
-                sig["Ticker"] = ticker
-                signals.append(sig)
-        results["Daily"] = pd.DataFrame(signals)
-
-    return results
+    bar_sets = {key: st.session_state[key] for key in pipeline.BAR_KEYS
+                if key in st.session_state}
+    return pipeline.run_scanners(bar_sets)
 
 if st.sidebar.button("📈 Run Scanners", key="scanner_button"):
-    st.session_state["signals"] = run_scanners()
+    signal_diff.record_run(run_scanners())
+    confluence = pipeline.run_confluence(st.session_state)
+    if confluence is not None:
+        store.save("confluence", confluence)
     st.success("Scanners executed!")
+    st.caption("Scan cache: " + ", ".join(
+        f"{category} {s['hits']} hits / {s['misses']} misses"
+        for category, s in scan_cache.last_stats.items()))
+
+precomputed = store.load("signals")
+if precomputed is not None:
+    st.session_state["signals"] = precomputed
+    st.session_state["signal_diff"] = store.load("signal_diff") or {}
 
 # ==========================================================
 # 5. DISPLAY RESULTS
 # ==========================================================
-if "signals" in st.session_state:
-    for category, df in st.session_state["signals"].items():
-        st.subheader(f"{category} VALID Signals")
-        if df.empty:
-            st.info(f"No VALID signals found for {category}.")
-            continue
-
-        st.dataframe(df)
-
-        # Allow user to click a ticker
-        tickers = df["Ticker"].tolist()
-        selected = st.selectbox(
-            f"Select {category} ticker",
-            tickers,
-            key=f"{category}_select"
-        )
-        if selected:
-            # Get data for selected ticker
-            if category == "Weekly":
-                g = st.session_state["market_data"].query("Ticker == @selected")
-                x_axis = g["Date"]
-            elif category == "Daily":
-                g = st.session_state["daily_data"].query("Ticker == @selected")
-                x_axis = g["Date"]
-            else:  # Hourly
-                g = st.session_state["hourly_data"].query("Ticker == @selected")
-                x_axis = g["Datetime"]
-
-            # Plot candlestick chart
-            fig = go.Figure(data=[go.Candlestick(
-                x=x_axis,
-                open=g["Open"], high=g["High"],
-                low=g["Low"], close=g["Close"]
-            )])
-
-            # Overlay Fib levels (from signal dict)
-            sig = df[df["Ticker"] == selected].iloc[0]
-            fig.add_hline(y=sig["Swing High"], line_color="green", annotation_text="Swing High")
-            fig.add_hline(y=sig["Swing Low"], line_color="red", annotation_text="Swing Low")
-            fig.add_hline(y=sig["Fib618"], line_color="blue", annotation_text="0.618")
-            fig.add_hline(y=sig["Fib786"], line_color="purple", annotation_text="0.786")
-
-            st.plotly_chart(fig, use_container_width=True)
+only_changes = st.sidebar.checkbox("Show only changes since last run", value=True,
+                                   key="only_changes")
+
+# Filtering, sorting and paging run server-side in signal_table (cached per
+# store version), so only one page of each table is sent to the browser
+index_filter = st.sidebar.selectbox("Index", ["All", *signal_table.options("Index")],
+                                    key="index_filter")
+sector_filter = st.sidebar.selectbox("Sector", ["All", *signal_table.options("Sector")],
+                                     key="sector_filter")
+max_distance = st.sidebar.number_input("Max distance from fib zone %", min_value=0.0,
+                                       value=None, placeholder="any", key="max_distance")
+sort_by = st.sidebar.selectbox("Sort by", ["Score", "Reward/Risk", "Rel Volume", "Distance %",
+                                           "Ticker", "Current Price", "Swing High Date"],
+                               key="sort_by")
+ascending = st.sidebar.checkbox("Ascending", value=False, key="ascending")
+
+signals_tab, trades_tab = st.tabs(["Signals", "Trade Analytics"])
+
+with signals_tab:
+    if "signals" in st.session_state:
+        for category in st.session_state["signals"]:
+            diff = st.session_state.get("signal_diff", {}).get(category)
+            changes = only_changes and diff is not None
+            filters = dict(
+                changes_only=changes,
+                index=None if index_filter == "All" else index_filter,
+                sector=None if sector_filter == "All" else sector_filter,
+                max_distance=max_distance, sort_by=sort_by, ascending=ascending,
+            )
+            total = len(signal_table.query(category, **filters))
+            if changes:
+                st.subheader(f"{category} Signal Changes")
+                st.caption(f"{len(diff['new'])} new, {len(diff['still_valid'])} still valid, "
+                           f"{len(diff['invalidated'])} invalidated")
+                if total == 0:
+                    st.info(f"No {category} signals changed since the last run.")
+                    continue
+            else:
+                st.subheader(f"{category} VALID Signals")
+                if total == 0:
+                    st.info(f"No VALID signals found for {category}.")
+                    continue
+
+            pages = -(-total // signal_table.PAGE_SIZE)
+            page_number = st.number_input(f"{category} page", min_value=1, max_value=pages,
+                                          value=1, key=f"{category}_page")
+            df, total, pages = signal_table.page(category, page_number - 1, **filters)
+            st.caption(f"{total} rows, page {page_number} of {pages}")
+            st.dataframe(df)
+
+            # Allow user to click a ticker (of the page shown)
+            tickers = df["Ticker"].tolist()
+            selected = st.selectbox(
+                f"Select {category} ticker",
+                tickers,
+                key=f"{category}_select"
+            )
+            if selected:
+                # Get data for selected ticker in any pyramid timeframe
+                timeframes = list(pyramid.TIMEFRAMES)
+                chart_tf = st.selectbox(
+                    "Chart timeframe", timeframes,
+                    index=timeframes.index(pyramid.resolve(category.lower())),
+                    key=f"{category}_chart_tf"
+                )
+                tf_bars = pyramid.get(chart_tf)
+                if tf_bars is None:
+                    st.info(f"No {chart_tf} bars in the store yet.")
+                    continue
+                g = bars.ticker_slice(tf_bars, selected)
+                x_axis = g[pyramid.TIMEFRAMES[chart_tf][1]]
+
+                # Plot candlestick chart
+                fig = go.Figure(data=[go.Candlestick(
+                    x=x_axis,
+                    open=g["Open"], high=g["High"],
+                    low=g["Low"], close=g["Close"]
+                )])
+
+                # Overlay Fib levels (from signal dict)
+                sig = df[df["Ticker"] == selected].iloc[0]
+                fig.add_hline(y=sig["Swing High"], line_color="green", annotation_text="Swing High")
+                fig.add_hline(y=sig["Swing Low"], line_color="red", annotation_text="Swing Low")
+                fig.add_hline(y=sig["Fib618"], line_color="blue", annotation_text="0.618")
+                fig.add_hline(y=sig["Fib786"], line_color="purple", annotation_text="0.786")
+
+                st.plotly_chart(fig, use_container_width=True)
+
+    # ----------------------------------------------------------
+    # Multi-timeframe confluence
+    # ----------------------------------------------------------
+    confluence = store.load("confluence")
+    if confluence is not None:
+        st.subheader("Multi-Timeframe Confluence")
+        if confluence.empty:
+            st.info("No tickers with overlapping fib zones across timeframes.")
+        else:
+            st.dataframe(confluence)
+
+
+# ==========================================================
+# 6. TRADE ANALYTICS
+# ==========================================================
+@st.cache_data
+def trade_report(stamp):
+    # `stamp` (log sizes and mtimes) is only there to key the cache
+    return analytics.report(analytics.load_trades())
+
+with trades_tab:
+    logs = sorted(glob.glob(analytics.TRADE_LOGS))
+    report = trade_report(tuple((f, os.path.getsize(f), os.path.getmtime(f)) for f in logs))
+    summary = report["summary"]
+    if not summary["Trades"] > 0:
+        st.info("No trades in " + (", ".join(logs) or analytics.TRADE_LOGS) + " yet.")
+    else:
+        cols = st.columns(6)
+        cols[0].metric("Trades", f"{summary['Trades']:,.0f}")
+        cols[1].metric("Win Rate", f"{summary['Win Rate %']:.1f}%")
+        cols[2].metric("Expectancy", f"{summary['Expectancy %']:.2f}%")
+        cols[3].metric("Avg Days", f"{summary['Avg Days']:.1f}")
+        cols[4].metric("Max Drawdown", f"{summary['Max Drawdown %']:.1f}%")
+        cols[5].metric("Max Concurrent", f"{summary['Max Concurrent']}")
+
+        # Charts plot one point per day; millions of raw points stall the browser
+        equity = report["equity"].resample("D").last().dropna()
+        fig = go.Figure(go.Scatter(x=equity.index, y=equity["Equity"], name="Equity"))
+        fig.add_trace(go.Scatter(x=equity.index, y=equity["Drawdown %"], name="Drawdown %",
+                                 yaxis="y2", fill="tozeroy", line_color="red"))
+        fig.update_layout(title="Equity Curve",
+                          yaxis2=dict(overlaying="y", side="right", title="Drawdown %"))
+        st.plotly_chart(fig, use_container_width=True)
+
+        positions = report["positions"].resample("D").max().dropna()
+        st.plotly_chart(go.Figure(go.Scatter(x=positions.index, y=positions, line_shape="hv"),
+                                  layout=dict(title="Concurrent Positions")),
+                        use_container_width=True)
+
+        st.subheader("By Month")
+        st.dataframe(report["by_month"].set_axis(report["by_month"].index.astype(str)).round(2))
+        st.subheader("By Ticker")
+        st.dataframe(report["by_ticker"].round(2))
@@ -0,0 +1,223 @@
+import argparse
+import asyncio
+import bisect
+import time
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+import numpy as np
+import pandas as pd
+
+import scheduler
+import sessions
+import store
+
+# ==========================================================
+# 1. BAR BUILDER
+# ==========================================================
+# A tick is (ticker, ts, price, size) with ts in UTC nanoseconds.
+# Bar set each built timeframe is appended to, and its time column.
+BUILT = {"hourly": ("hourly_data", "Datetime"), "daily": ("daily_data", "Date")}
+
+_NS = 1_000_000_000
+
+
+class BarBuilder:
+    """
+    Aggregate ticks into 1h and 1d OHLCV bars per ticker, on the same
+    session-anchored buckets the scheduler waits for. Bars close when a
+    tick of the same ticker lands in a later bucket or when close_due()
+    is called with a watermark past the bucket end.
+    """
+
+    def __init__(self, ticker_universe, default_universe="SP500"):
+        self.ticker_universe = ticker_universe   # ticker -> universe label
+        self.default_universe = default_universe
+        self.open_bars = {tf: {} for tf in BUILT}   # ticker -> [start, end, o, h, l, c, v]
+        self.closed = {tf: [] for tf in BUILT}       # (ticker, bar) in close order
+        self._bounds = {}
+        self.ticks = 0
+        self.dropped = 0
+        self.bars_built = {tf: 0 for tf in BUILT}
+
+    def _bucket(self, timeframe, ticker, ts):
+        universe = self.ticker_universe.get(ticker, self.default_universe)
+        tz = ZoneInfo(scheduler.SESSIONS[universe]["tz"])
+        day = datetime.fromtimestamp(ts / _NS, tz).date()
+        key = (timeframe, universe, day)
+        if key not in self._bounds:
+            self._bounds[key] = [(int(a.timestamp()) * _NS, int(b.timestamp()) * _NS)
+                                 for a, b in scheduler.bar_bounds(universe, day, timeframe)]
+        bounds = self._bounds[key]
+        i = bisect.bisect_right(bounds, (ts, float("inf"))) - 1
+        if i >= 0 and bounds[i][0] <= ts < bounds[i][1]:
+            return bounds[i]
+        return None   # outside regular session
+
+    def on_tick(self, ticker, ts, price, size):
+        self.ticks += 1
+        for tf, bars in self.open_bars.items():
+            bar = bars.get(ticker)
+            if bar is not None and bar[0] <= ts < bar[1]:
+                if price > bar[3]:
+                    bar[3] = price
+                if price < bar[4]:
+                    bar[4] = price
+                bar[5] = price
+                bar[6] += size
+                continue
+            if bar is not None and ts < bar[0]:
+                self.dropped += 1   # late tick for a bar that already rolled
+                continue
+            bounds = self._bucket(tf, ticker, ts)
+            if bounds is None:
+                self.dropped += 1
+                continue
+            if bar is not None:
+                self.closed[tf].append((ticker, bars.pop(ticker)))
+            bars[ticker] = [bounds[0], bounds[1], price, price, price, price, size]
+
+    def close_due(self, watermark=None):
+        """Close every open bar whose bucket ends at or before `watermark` (all if None)."""
+        for tf, bars in self.open_bars.items():
+            done = [t for t, bar in bars.items() if watermark is None or bar[1] <= watermark]
+            for t in done:
+                self.closed[tf].append((t, bars.pop(t)))
+
+    def drain(self):
+        """Closed bars since the last drain as {bar set: DataFrame}, already normalized."""
+        out = {}
+        for tf, closed in self.closed.items():
+            if not closed:
+                continue
+            self.closed[tf] = []
+            key, time_col = BUILT[tf]
+            tickers = [t for t, _ in closed]
+            start = np.array([bar[0] for _, bar in closed], dtype=np.int64)
+            ohlcv = np.array([bar[2:] for _, bar in closed], dtype=float)
+            universe = [self.ticker_universe.get(t, self.default_universe) for t in tickers]
+            session = sessions.session_ids(universe)
+            wall = sessions.local_ns(start, session)
+            if tf == "daily":
+                # daily rows are keyed by the session date, like downloaded ones
+                wall -= wall % (86_400 * _NS)
+                start = sessions.utc_ns(wall, session)
+            df = pd.DataFrame({
+                time_col: wall.view("datetime64[ns]"),
+                "Open": ohlcv[:, 0], "High": ohlcv[:, 1], "Low": ohlcv[:, 2],
+                "Close": ohlcv[:, 3], "Adj Close": ohlcv[:, 3], "Volume": ohlcv[:, 4],
+                "Ticker": tickers, "Index": universe, "ts": start, "session": session,
+            })
+            out[key] = df
+            self.bars_built[tf] += len(df)
+        return out
+
+
+# ==========================================================
+# 2. SERVICE
+# ==========================================================
+def _persist(frames):
+    for key, df in frames.items():
+        store.append_rows(key, df, BUILT["hourly" if key == "hourly_data" else "daily"][1])
+
+
+async def run_bar_service(feed, builder, flush_seconds=5.0, persist=True):
+    """
+    Consume an async iterator of ticks, closing bars by feed time and
+    appending closed bars to the store every `flush_seconds` of wall time.
+    When the feed ends every open bar is closed and flushed.
+    """
+    last_flush = time.monotonic()
+    watermark = None
+    async for ticker, ts, price, size in feed:
+        builder.on_tick(ticker, ts, price, size)
+        watermark = ts if watermark is None or ts > watermark else watermark
+        if time.monotonic() - last_flush >= flush_seconds:
+            builder.close_due(watermark)
+            frames = builder.drain()
+            if persist and frames:
+                await asyncio.to_thread(_persist, frames)
+            last_flush = time.monotonic()
+    builder.close_due()
+    frames = builder.drain()
+    if persist and frames:
+        await asyncio.to_thread(_persist, frames)
+    return frames
+
+
+# ==========================================================
+# 3. LOCAL REPLAY FEED
+# ==========================================================
+def replay_ticks(bars, time_col="Datetime", ticks_per_bar=4, span_seconds=1800):
+    """
+    Turn stored bars into a time-ordered tick tape. Each bar becomes open,
+    then low/high (high first on down bars), then close, spread over the
+    first `span_seconds` of the bar; extra ticks fall on the close path.
+    Returns (tickers, ts, price, size) arrays.
+    """
+    ticks_per_bar = max(4, ticks_per_bar)
+    o, h, l, c = (bars[k].to_numpy(dtype=float) for k in ("Open", "High", "Low", "Close"))
+    if "ts" in bars:
+        start = bars["ts"].to_numpy()
+    else:
+        start = pd.DatetimeIndex(pd.to_datetime(bars[time_col], utc=True)).as_unit("ns").asi8
+    down = c < o
+
+    path = np.empty((len(bars), ticks_per_bar))
+    path[:, 0] = o
+    path[:, 1] = np.where(down, h, l)
+    path[:, 2] = np.where(down, l, h)
+    path[:, 3:] = c[:, None]
+    frac = np.linspace(0, 1, ticks_per_bar, endpoint=False)
+    ts = start[:, None] + (frac * span_seconds * _NS).astype(np.int64)[None, :]
+    size = np.repeat((bars["Volume"].to_numpy(dtype=float) / ticks_per_bar)[:, None],
+                     ticks_per_bar, axis=1)
+    tickers = np.repeat(bars["Ticker"].to_numpy()[:, None], ticks_per_bar, axis=1)
+
+    order = np.argsort(ts.ravel(), kind="stable")
+    return tickers.ravel()[order], ts.ravel()[order], path.ravel()[order], size.ravel()[order]
+
+
+async def replay_feed(bars, time_col="Datetime", ticks_per_bar=4, speed=None):
+    """
+    Async tick source built from stored bars. `speed` is a replay multiple
+    of real time (60 = one hour of ticks per minute); None replays as fast
+    as the consumer keeps up, for load tests.
+    """
+    tickers, ts, price, size = replay_ticks(bars, time_col, ticks_per_bar)
+    t0 = time.monotonic()
+    for i in range(len(ts)):
+        if speed is not None:
+            due = (ts[i] - ts[0]) / _NS / speed - (time.monotonic() - t0)
+            if due > 0:
+                await asyncio.sleep(due)
+        elif i % 1000 == 0:
+            await asyncio.sleep(0)   # let other tasks run during a flat-out replay
+        yield tickers[i], int(ts[i]), float(price[i]), float(size[i])
+
+
+# ==========================================================
+# 4. OFFLINE LOAD TEST
+# ==========================================================
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay stored hourly bars through the bar builder")
+    parser.add_argument("--ticks-per-bar", type=int, default=4)
+    parser.add_argument("--speed", type=float, default=None)
+    parser.add_argument("--persist", action="store_true", help="append rebuilt bars to the store")
+    args = parser.parse_args()
+
+    hourly = store.load("hourly_data")
+    if hourly is None:
+        raise RuntimeError("No hourly bars in the store; run a refresh first")
+    universes = store.load("universes")
+    ticker_universe = {} if universes is None else dict(zip(universes["Ticker"], universes["Index"]))
+    builder = BarBuilder(ticker_universe)
+
+    t0 = time.perf_counter()
+    feed = replay_feed(hourly, ticks_per_bar=args.ticks_per_bar, speed=args.speed)
+    frames = asyncio.run(run_bar_service(feed, builder, persist=args.persist))
+    secs = time.perf_counter() - t0
+    print(f"{builder.ticks:,} ticks in {secs:.2f}s ({builder.ticks / secs:,.0f} ticks/s), "
+          f"{builder.dropped:,} outside session")
+    for tf, n in builder.bars_built.items():
+        print(f"{tf}: {n:,} bars built")
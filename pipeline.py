@@ -0,0 +1,194 @@
+import pandas as pd
+
+from Updater import download_yahoo_prices, iter_yahoo_batches
+from updater_daily import download_daily_prices, iter_daily_batches
+from updater_hourly import download_hourly_prices, iter_hourly_batches
+import bars
+import prefilter
+import pyramid
+import ranking
+import scan_cache
+import scanner
+import scanner_daily
+import scanner_hourly
+import scanner_confluence
+import sessions
+
+# ==========================================================
+# 1. BAR SETS
+# ==========================================================
+# Store / session-state key -> timestamp column of that bar set.
+#   market_data : ~600d of daily bars, resampled to weekly by scanner.py
+#   daily_data  : ~730d of daily bars for scanner_daily.py
+#   hourly_data : ~60d of hourly bars for scanner_hourly.py
+BAR_KEYS = {
+    "market_data": "Date",
+    "daily_data": "Date",
+    "hourly_data": "Datetime",
+}
+
+# Bar set -> (downloader, history period) used to (re)fill it.
+DOWNLOADS = {
+    "market_data": (download_yahoo_prices, "600d"),
+    "daily_data": (download_daily_prices, "730d"),
+    "hourly_data": (download_hourly_prices, "60d"),
+}
+
+# Bar set -> batch generator yielding (frames, failed) as each batch lands.
+BATCHES = {
+    "market_data": iter_yahoo_batches,
+    "daily_data": iter_daily_batches,
+    "hourly_data": iter_hourly_batches,
+}
+
+
+def merge_frames(frames, time_col):
+    """Concatenate per-ticker frames onto the normalized UTC time axis (sessions.normalize)."""
+    combined = sessions.normalize(pd.concat(frames, ignore_index=True), time_col)
+    return combined.sort_values(["Ticker", "ts"], kind="stable").reset_index(drop=True)
+
+
+# ==========================================================
+# 2. VALID-ONLY SCANS
+# ==========================================================
+def scan_weekly_valid(df, use_prefilter=True, lookback_weeks=80):
+    if use_prefilter:
+        df = prefilter.prune(df, prefilter.weekly_survivors(df, lookback_weeks), "Weekly")
+        if df.empty:
+            return pd.DataFrame()
+    return _weekly_valid(scanner.scan_weekly_bars(pyramid.aggregate(df, "weekly"), lookback_weeks))
+
+
+def _weekly_valid(signals):
+    if signals.empty:
+        return signals
+    valid = signals[signals["Signal"] == "VALID"]
+
+    if not valid.empty:
+        valid = valid.rename(columns={"Latest Price": "Current Price",
+                                      "Retr Low": "Retrace Low"})
+        # Reorder columns
+        valid = valid[["Ticker", "Current Price",
+                       "Swing High", "Swing High Date", "Swing Low",
+                       "Fib618", "Fib786", "Retrace Low"]]
+    return valid
+
+
+def scan_swing_valid(df, time_col, detect, lookback):
+    """
+    VALID rows of `detect` (a detect_swing_arrays) over every ticker, each
+    given slices of one sorted set of arrays rather than its own frame.
+    """
+    a, ranges = bars.load_arrays(df, time_col)
+    signals = []
+    for ticker, (s, e) in ranges.items():
+        sig = detect(a["low"][s:e], a["high"][s:e], a["close"][s:e], a["time"][s:e], lookback)
+        if sig and sig["Signal"] == "VALID":
+            sig["Ticker"] = ticker
+            signals.append(sig)
+    return pd.DataFrame(signals)
+
+
+def scan_daily_valid(df, use_prefilter=True, lookback_days=250):
+    if use_prefilter:
+        df = prefilter.prune(df, prefilter.swing_survivors(df, "Date", lookback_days), "Daily")
+    return scan_swing_valid(df, "Date", scanner_daily.detect_swing_arrays, lookback_days)
+
+
+def scan_hourly_valid(df, use_prefilter=True, lookback_hours=120):
+    if use_prefilter:
+        df = prefilter.prune(df, prefilter.swing_survivors(df, "Datetime", lookback_hours), "Hourly")
+    return scan_swing_valid(df, "Datetime", scanner_hourly.detect_swing_arrays, lookback_hours)
+
+
+# ==========================================================
+# 3. ALL SCANNERS
+# ==========================================================
+def _enriched(scan, time_col, weekly=False):
+    """`scan` whose VALID rows carry ranking.enrich's per-ticker columns."""
+    def enriched_scan(df, **params):
+        return ranking.enrich(scan(df, **params), df, time_col, weekly)
+    return enriched_scan
+
+
+# Bar set -> (category, VALID-only scan over that bar set). Every path
+# (run_scanners, the scan cache, streaming.py, chunked.py) scans through
+# these, so rows always come back enriched; ranking.rank scores them once
+# the whole table is together.
+SCANS = {
+    "market_data": ("Weekly", _enriched(scan_weekly_valid, "Date", weekly=True)),
+    "hourly_data": ("Hourly", _enriched(scan_hourly_valid, "Datetime")),
+    "daily_data": ("Daily", _enriched(scan_daily_valid, "Date")),
+}
+
+# Bar set -> keyword parameters of its scan
+SCAN_PARAMS = {
+    "market_data": {"lookback_weeks": 80},
+    "hourly_data": {"lookback_hours": 120},
+    "daily_data": {"lookback_days": 250},
+}
+
+# Part of the scan cache key: bump it when the scans' row layout changes,
+# so rows cached in the old layout are rescanned
+ROW_LAYOUT = 2
+
+
+def cached_scan(key, df):
+    """SCANS[key] over `df`, rescanning only tickers whose bars changed."""
+    category, scan = SCANS[key]
+    params = SCAN_PARAMS[key]
+    return scan_cache.cached_scan(category, df, BAR_KEYS[key], lambda d: scan(d, **params),
+                                  {**params, "layout": ROW_LAYOUT})
+
+
+def run_scanners(bars, use_cache=True):
+    """
+    Run every scanner whose bar set is present in `bars`
+    (a mapping of BAR_KEYS -> DataFrame) and return {category: VALID rows}.
+    With `use_cache`, only tickers whose bars changed since the last run
+    are rescanned. Rows come back ranked (see ranking.rank).
+    """
+    results = {}
+    for key, (category, scan) in SCANS.items():
+        if bars.get(key) is None:
+            continue
+        if use_cache:
+            results[category] = cached_scan(key, bars[key])
+        else:
+            results[category] = scan(bars[key], **SCAN_PARAMS[key])
+        results[category] = ranking.rank(results[category])
+    return results
+
+
+# Timeframe -> default swing lookback in bars of that timeframe, sized to
+# the history the base downloads give each level
+TIMEFRAME_LOOKBACKS = {
+    "1h": 120, "2h": 60, "4h": 30,
+    "1d": 250, "2d": 125, "1w": 80, "1mo": 20,
+}
+
+
+def scan_timeframe(timeframe, lookback=None):
+    """
+    VALID rows for any pyramid timeframe, scanned from the bars already in
+    the store. Weekly uses the weekly scanner, everything else the swing
+    retrace scanner the daily and hourly scans share.
+    """
+    tf = pyramid.resolve(timeframe)
+    df = pyramid.get(tf)
+    if df is None or df.empty:
+        return pd.DataFrame()
+    lookback = lookback or TIMEFRAME_LOOKBACKS[tf]
+    time_col = pyramid.TIMEFRAMES[tf][1]
+    if tf == "1w":
+        valid = _weekly_valid(scanner.scan_weekly_bars(df, lookback))
+    else:
+        valid = scan_swing_valid(df, time_col, scanner_daily.detect_swing_arrays, lookback)
+    return ranking.rank(ranking.enrich(valid, df, time_col))
+
+
+def run_confluence(bars):
+    """Multi-timeframe confluence ranking, or None without daily bars."""
+    if bars.get("daily_data") is None:
+        return None
+    return scanner_confluence.scan_confluence(bars["daily_data"], bars.get("hourly_data"))
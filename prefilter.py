@@ -0,0 +1,93 @@
+import numpy as np
+
+import bars
+
+# ==========================================================
+# 1. BOUNDS
+# ==========================================================
+# Every test below is a necessary condition for a VALID signal, derived
+# from the scanners' own rules, so a pruned ticker could never have come out
+# VALID. The fib618 bound uses the same expression as the scanners and a
+# tiny relative slack so float rounding can only ever keep a ticker.
+SLACK = 1e-9
+
+
+def _fib618_bound(high, low):
+    return (high - 0.618 * (high - low)) * (1 + SLACK)
+
+
+# ==========================================================
+# 2. DAILY / HOURLY (detect_swing_and_retrace)
+# ==========================================================
+def swing_survivors(df, time_col, lookback):
+    """
+    Tickers that can still be VALID for detect_swing_and_retrace. The
+    retrace low is at most the 0.618 level of a swing inside the lookback
+    window, so the latest close must be within 3% of that level computed
+    from the window's extreme high and low.
+    """
+    a, ranges = bars.load_arrays(df, time_col)
+    if not ranges:
+        return []
+    names = np.array(list(ranges), dtype=object)
+    starts, ends = np.array(list(ranges.values())).T
+
+    enough = ends - starts >= lookback
+    names, ends = names[enough], ends[enough]
+    if len(names) == 0:
+        return []
+    ws = ends - lookback
+
+    h_max = bars.reduce_ranges(np.maximum, a["high"], ws, ends)
+    l_min = bars.reduce_ranges(np.minimum, a["low"], ws, ends)
+    keep = a["close"][ends - 1] <= _fib618_bound(h_max, l_min) * 1.03
+    return names[keep].tolist()
+
+
+# ==========================================================
+# 3. WEEKLY (scanner.scan_weekly)
+# ==========================================================
+def weekly_survivors(df, lookback_weeks=80, recent_weeks=8):
+    """
+    Tickers that can still be VALID for scan_weekly. The retrace low has to
+    sit in the last `recent_weeks` weeks and below the 0.618 level; that
+    level is at most what the window's highest high and the lowest low of
+    its first four weeks give (a pivot needs three weeks on either side).
+    """
+    daily, d_ranges = bars.load_arrays(df, "Date")
+    if not d_ranges:
+        return []
+    weekly, w_ranges = bars.weekly_arrays(daily, d_ranges)
+    names = np.array(list(w_ranges), dtype=object)
+    starts, ends = np.array(list(w_ranges.values())).T
+    ws = np.maximum(starts, ends - lookback_weeks)
+
+    enough = ends - ws >= 10
+    names, starts, ends, ws = names[enough], starts[enough], ends[enough], ws[enough]
+    if len(names) == 0:
+        return []
+
+    h_max = bars.reduce_ranges(np.maximum, weekly["high"], ws, ends)
+    first_low = bars.reduce_ranges(np.minimum, weekly["low"], ws, ws + 4)
+
+    latest = np.repeat(weekly["time"][ends - 1], ends - starts)
+    in_ticker = np.concatenate([np.arange(s, e) for s, e in zip(starts, ends)])
+    recent = weekly["time"][in_ticker] >= latest - np.timedelta64(7 * recent_weeks, "D")
+    recent_low = bars.reduce_ranges(
+        np.minimum,
+        np.where(recent, weekly["low"][in_ticker], np.inf),
+        np.r_[0, np.cumsum(ends - starts)[:-1]],
+        np.cumsum(ends - starts),
+    )
+    keep = recent_low <= _fib618_bound(h_max, first_low)
+    return names[keep].tolist()
+
+
+# ==========================================================
+# 4. APPLY
+# ==========================================================
+def prune(df, survivors, label):
+    """Keep only `survivors` in `df` and report how many tickers were skipped."""
+    total = df["Ticker"].nunique()
+    print(f"[prefilter] {label}: pruned {total - len(survivors)} of {total} tickers")
+    return df[df["Ticker"].isin(survivors)]
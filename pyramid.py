@@ -0,0 +1,247 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+import bars
+import scan_cache
+import store
+
+# ==========================================================
+# 1. TIMEFRAMES
+# ==========================================================
+# Timeframe -> (base bar set, its time column, bucket-key function or None
+# for the base itself). Every level is derived from the base bars in the
+# store, never downloaded.
+TIMEFRAMES = {
+    "1h": ("hourly_data", "Datetime", None),
+    "2h": ("hourly_data", "Datetime", bars.intraday_keys(2)),
+    "4h": ("hourly_data", "Datetime", bars.intraday_keys(4)),
+    "1d": ("daily_data", "Date", None),
+    "2d": ("daily_data", "Date", bars.day_keys(2)),
+    "1w": ("daily_data", "Date", bars.week_keys),
+    "1mo": ("daily_data", "Date", bars.month_keys),
+}
+
+ALIASES = {"hourly": "1h", "daily": "1d", "weekly": "1w", "monthly": "1mo"}
+
+
+def resolve(timeframe):
+    """Canonical timeframe name; raises KeyError for unsupported ones."""
+    tf = ALIASES.get(timeframe, timeframe)
+    if tf not in TIMEFRAMES:
+        raise KeyError(f"unknown timeframe {timeframe!r}; use one of "
+                       f"{', '.join([*TIMEFRAMES, *ALIASES])}")
+    return tf
+
+
+def _label(timeframe, keys, first_times):
+    """Time label of each aggregated bar, following pandas' resample conventions."""
+    if timeframe == "1w":     # W-FRI: the week's Friday
+        days = keys
+    elif timeframe == "1mo":  # ME: the month's last day
+        days = (keys + 1).astype("datetime64[M]").astype("datetime64[D]").astype(np.int64) - 1
+    else:                     # 2d and intraday: the first bar's own time
+        return first_times
+    return days.astype("datetime64[D]").astype("datetime64[ns]")
+
+
+# ==========================================================
+# 2. AGGREGATION
+# ==========================================================
+def _row_tickers(ranges, n):
+    """Ticker of every row of sorted arrays, from their range index."""
+    names = np.empty(n, dtype=object)
+    for ticker, (s, e) in ranges.items():
+        names[s:e] = ticker
+    return names
+
+
+def _aggregate(timeframe, a, ranges, keys, time_col):
+    agg, ranges, starts, ends = bars.aggregate_arrays(a, ranges, keys)
+    names = _row_tickers(ranges, len(starts))
+    df = pd.DataFrame({
+        time_col: _label(timeframe, keys[starts], agg["time"]),
+        "Open": agg["open"], "High": agg["high"], "Low": agg["low"], "Close": agg["close"],
+    })
+    if "Adj Close" in a:
+        df["Adj Close"] = a["Adj Close"][ends - 1]
+    df["Volume"] = agg["volume"]
+    df["Ticker"] = names
+    if "Index" in a:
+        df["Index"] = a["Index"][starts]
+    return df, keys[starts]
+
+
+def aggregate(df, timeframe):
+    """`timeframe` bars built from a base bar frame, without any caching."""
+    tf = resolve(timeframe)
+    _, time_col, key_fn = TIMEFRAMES[tf]
+    if key_fn is None:
+        return df
+    a, ranges = bars.load_arrays(df, time_col, [c for c in ("Adj Close", "Index") if c in df])
+    return _aggregate(tf, a, ranges, key_fn(a["time"], ranges), time_col)[0]
+
+
+# ==========================================================
+# 3. CACHED, INCREMENTAL LEVELS
+# ==========================================================
+# Each level's bars are stored as their own frame, "pyramid/<tf>/bars"
+# (an Arrow file, memory-mapped on load like the base bars, so chart
+# slices of a level are views too), next to "pyramid/<tf>/state": the
+# base version it reflects, the bars file version it goes with, each
+# bar's bucket key and value fingerprint (the sum of its base bars'
+# Close and Adj Close) and, per ticker, its bar count, the first bar
+# time and the time of the first of its last scan_cache.TAIL_ROWS bars.
+# When the base changes only the buckets from that tail bar onward are
+# re-aggregated, which covers appended bars and revisions of the
+# still-forming bar. A history start that moved forward (fixed download
+# windows such as 730d or 60d) drops the buckets before it and
+# re-aggregates the new first day, whose buckets are partial (and,
+# intraday, re-anchored); a ticker whose start moved back, whose tail
+# bar vanished or whose kept buckets no longer match their fingerprints
+# (a split or dividend restating old prices) is rebuilt in full. When
+# more than REBUILD_SHARE of the base rows need re-aggregating anyway,
+# the whole level is rebuilt without merging.
+REBUILD_SHARE = 0.5
+
+_lock = threading.Lock()
+_DAY_NS = 86_400 * 10**9
+_NONE = np.iinfo(np.int64).min   # a cutoff that keeps no old bucket
+
+
+def _starts(tickers, keys):
+    """First row of every bucket of rows in (ticker code, key) order."""
+    return np.flatnonzero(np.r_[True, (np.diff(keys) != 0) | (np.diff(tickers) != 0)][:len(keys)])
+
+
+def _value(a):
+    """Close plus Adj Close of every row: a restatement (split, dividend) changes its bucket sums."""
+    value = np.nan_to_num(a["close"])
+    if "Adj Close" in a:
+        value += np.nan_to_num(np.asarray(a["Adj Close"], dtype=float))
+    return value
+
+
+def _restated(tickers, keys, sums, old_tickers, old_keys, old_sums, n):
+    """
+    Boolean per ticker code: its kept buckets differ from the stored ones.
+    Both sides are in (ticker code, key) order, as every level is stored.
+    """
+    bad = np.bincount(tickers, minlength=n) != np.bincount(old_tickers, minlength=n)
+    new, old = ~bad[tickers], ~bad[old_tickers]
+    # exact comparison: unchanged base rows sum to the very same floats
+    differs = (keys[new] != old_keys[old]) | (sums[new] != old_sums[old])
+    bad[tickers[new][differs]] = True
+    return bad
+
+
+def _update(tf, base, entry):
+    _, time_col, key_fn = TIMEFRAMES[tf]
+    a, ranges = bars.load_arrays(base, time_col, [c for c in ("Adj Close", "Index") if c in base])
+    # every key function works on wall-clock times: convert once
+    wall = bars.wall_clock_ns(a["time"])
+    keys = key_fn(wall.view("datetime64[ns]"), ranges)
+    names = pd.Index(list(ranges))
+    row_ticker = np.repeat(np.arange(len(names)), [e - s for s, e in ranges.values()])
+
+    old_spans = entry["spans"] if entry else {}
+    spans = {}
+    lead, cutoff = np.full(len(names), _NONE), np.full(len(names), _NONE)
+    for i, (ticker, (s, e)) in enumerate(ranges.items()):
+        times = a["time"][s:e]
+        spans[ticker] = (times[0], times[max(0, len(times) - scan_cache.TAIL_ROWS)])
+        old = old_spans.get(ticker)
+        if old is None or times[0] < old[0]:
+            continue
+        tail = np.searchsorted(times, old[1])
+        if tail == len(times):
+            continue
+        cutoff[i] = keys[s + tail]
+        lead[i] = keys[s]
+        if times[0] != old[0]:
+            next_day = s + np.searchsorted(wall[s:e], (wall[s] // _DAY_NS + 1) * _DAY_NS)
+            lead[i] = max(keys[s] + 1, keys[next_day] if next_day < e else keys[e - 1] + 1)
+
+    # Every bucket of the new base, in level order, with its fingerprint;
+    # the kept ones are taken from the stored level
+    starts = _starts(row_ticker, keys)
+    tickers, bucket_keys, sums = row_ticker[starts], keys[starts], np.add.reduceat(_value(a), starts)
+    kept = (keys >= lead[row_ticker]) & (keys < cutoff[row_ticker])
+    if entry and (~kept).sum() <= REBUILD_SHARE * len(keys):
+        old_ticker = np.repeat(names.get_indexer(list(old_spans)), entry["counts"])
+        old_keep = old_ticker >= 0
+        old_keep[old_keep] = ((entry["keys"][old_keep] >= lead[old_ticker[old_keep]])
+                              & (entry["keys"][old_keep] < cutoff[old_ticker[old_keep]]))
+        kb = kept[starts]
+        restated = _restated(tickers[kb], bucket_keys[kb], sums[kb], old_ticker[old_keep],
+                             entry["keys"][old_keep], entry["sums"][old_keep], len(names))
+        if restated.any():
+            kept &= ~restated[row_ticker]
+            old_keep &= ~restated[np.maximum(old_ticker, 0)]
+    else:
+        kept[:] = False
+
+    # Base rows to re-aggregate: everything of new or rebuilt tickers, the
+    # leading and tail buckets of the rest
+    redo = np.flatnonzero(~kept)
+    sub = {k: v[redo] for k, v in a.items()}
+    out, _ = _aggregate(tf, sub, bars.ticker_ranges(names.to_numpy()[row_ticker[redo]]), keys[redo], time_col)
+    if kept.any():
+        kb = kept[starts]
+        rows = np.empty(len(starts), dtype=np.int64)
+        rows[kb] = np.flatnonzero(old_keep)
+        rows[~kb] = len(old_keep) + np.arange(len(out))
+        out = pd.concat([entry["bars"], out], ignore_index=True).take(rows).reset_index(drop=True)
+    entry = {"spans": spans, "counts": np.bincount(tickers, minlength=len(names)),
+             "keys": bucket_keys, "sums": sums, "bars": out}
+    return entry, len(redo)
+
+
+def _load_level(tf):
+    """Stored level of `tf` as {version, spans, counts, keys, sums, bars}; None if missing, torn or outdated."""
+    state = store.load(f"pyramid/{tf}/state")
+    if (state is None or "counts" not in state
+            or state["bars_version"] != store.version(f"pyramid/{tf}/bars")):
+        return None
+    return {**state, "bars": store.load(f"pyramid/{tf}/bars")}
+
+
+def _save_level(tf, entry):
+    """Write a level (bars first, so a torn write is caught by its bars version); returns its bars."""
+    store.save(f"pyramid/{tf}/bars", entry["bars"])
+    state = {k: v for k, v in entry.items() if k != "bars"}
+    store.save(f"pyramid/{tf}/state", {**state, "bars_version": store.version(f"pyramid/{tf}/bars")})
+    return store.load(f"pyramid/{tf}/bars")
+
+
+def get(timeframe):
+    """
+    Bars of any supported timeframe from the store, bringing the cached
+    level up to date with its base bars first. None without base bars.
+    """
+    tf = resolve(timeframe)
+    base_key, _, key_fn = TIMEFRAMES[tf]
+    if key_fn is None:
+        return store.load(base_key)
+
+    with _lock:
+        version = store.version(base_key)
+        entry = _load_level(tf)
+        if entry is not None and entry["version"] == version:
+            return entry["bars"]
+        base = store.load(base_key)
+        if base is None:
+            return None
+        entry, redone = _update(tf, base, entry)
+        entry["version"] = version
+        level = _save_level(tf, entry)
+    print(f"[pyramid] {tf}: re-aggregated {redone:,} of {len(base):,} {base_key} rows")
+    return level
+
+
+def refresh(base_keys):
+    """Bring every level built on `base_keys` up to date (after new bars land)."""
+    for tf, (base_key, _, key_fn) in TIMEFRAMES.items():
+        if key_fn is not None and base_key in base_keys:
+            get(tf)
@@ -0,0 +1,135 @@
+import warnings
+
+import numpy as np
+import pandas as pd
+
+import bars
+import pyramid
+import store
+
+# ==========================================================
+# 1. SETTINGS
+# ==========================================================
+ATR_PERIOD = 14
+RVOL_PERIOD = 20
+
+# Stop for reward/risk: this many ATRs below the retrace low
+STOP_ATR = 0.5
+
+# Score = sum of weight x cross-sectional percentile rank of each column;
+# a negative weight ranks low values best.
+SCORE_WEIGHTS = {
+    "Reward/Risk": 1.0,
+    "Rel Volume": 0.5,
+    "From Retrace Low %": -0.5,
+}
+
+
+# ==========================================================
+# 2. INDICATORS (one matrix per column, one row per ticker)
+# ==========================================================
+def tail_matrix(values, starts, ends, n):
+    """Last `n` values of every (start, end) row range, NaN-padded on the left."""
+    idx = ends[:, None] - n + np.arange(n)[None, :]
+    inside = idx >= starts[:, None]
+    return np.where(inside, values[np.clip(idx, 0, None)], np.nan)
+
+
+def indicators(df, time_col, tickers):
+    """
+    ATR, ATR % and relative volume of `tickers` from their bars in `df`,
+    computed for every ticker at once on aligned tail matrices. Returns a
+    frame indexed like `tickers`; tickers without bars get NaN.
+    """
+    out = pd.DataFrame(index=pd.Index(tickers, name="Ticker"),
+                       columns=["ATR", "ATR %", "Rel Volume"], dtype=float)
+    a, ranges = bars.load_arrays(df[df["Ticker"].isin(tickers)], time_col)
+    names = [t for t in tickers if t in ranges]
+    if not names:
+        return out
+    starts, ends = np.array([ranges[t] for t in names]).T
+
+    high = tail_matrix(a["high"], starts, ends, ATR_PERIOD + 1)
+    low = tail_matrix(a["low"], starts, ends, ATR_PERIOD + 1)
+    close = tail_matrix(a["close"], starts, ends, ATR_PERIOD + 1)
+    prev = close[:, :-1]
+    tr = np.fmax(high[:, 1:] - low[:, 1:],
+                 np.fmax(np.abs(high[:, 1:] - prev), np.abs(low[:, 1:] - prev)))
+    vol = tail_matrix(a["volume"], starts, ends, RVOL_PERIOD + 1)
+    with np.errstate(invalid="ignore", divide="ignore"), warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)   # all-NaN rows of short histories
+        atr = np.nanmean(tr, axis=1)
+        rvol = vol[:, -1] / np.nanmean(vol[:, :-1], axis=1)
+
+    out.loc[names, "ATR"] = atr
+    out.loc[names, "ATR %"] = atr / close[:, -1] * 100
+    out.loc[names, "Rel Volume"] = rvol
+    return out
+
+
+# ==========================================================
+# 3. RANKING
+# ==========================================================
+def universe_info(tickers):
+    """Name and Sector of each ticker from the universes table in the store."""
+    universes = store.load("universes")
+    table = pd.DataFrame(columns=["Name", "Sector"]) if universes is None else \
+        universes.drop_duplicates("Ticker").set_index("Ticker")
+    return table.reindex(pd.Index(tickers, name="Ticker"), columns=["Name", "Sector"])
+
+
+def score(df, weights=None):
+    """Score of every row; a column `df` lacks ranks every row at the middle (0.5)."""
+    weights = SCORE_WEIGHTS if weights is None else weights
+    total = np.zeros(len(df))
+    for col, w in weights.items():
+        pct = df[col].rank(pct=True).fillna(0.5).to_numpy() if col in df else 0.5
+        total += w * pct
+    return total
+
+
+def enrich(valid, df, time_col, weekly=False):
+    """
+    Add Stock Name, Sector, ATR, ATR %, Rel Volume, From Retrace Low % and
+    Reward/Risk to VALID signal rows. `df` holds the bars the signals were
+    scanned on (daily bars for `weekly` signals); only the signalled
+    tickers' bars are touched. Every column depends on its own ticker
+    alone, so rows enriched batch by batch (or cached) match rows enriched
+    all at once.
+    """
+    if valid is None or valid.empty:
+        return valid
+    tickers = valid["Ticker"].unique()
+    if weekly:
+        df = pyramid.aggregate(df[df["Ticker"].isin(tickers)], "weekly")
+
+    out = valid.drop(columns=["Stock Name"], errors="ignore")
+    info = universe_info(tickers)
+    at = out.columns.get_loc("Ticker") + 1
+    out.insert(at, "Stock Name", out["Ticker"].map(info["Name"]).fillna("Unknown").to_numpy())
+    out.insert(at + 1, "Sector", out["Ticker"].map(info["Sector"]).to_numpy())
+    ind = indicators(df, time_col, tickers)
+    for col in ind:
+        out[col] = out["Ticker"].map(ind[col]).to_numpy(dtype=float)
+
+    price = out["Current Price"].to_numpy(dtype=float)
+    retrace = out["Retrace Low" if "Retrace Low" in out else "Retr Low"].to_numpy(dtype=float)
+    stop = retrace - STOP_ATR * np.nan_to_num(out["ATR"].to_numpy())
+    with np.errstate(invalid="ignore", divide="ignore"):
+        out["From Retrace Low %"] = (price / retrace - 1) * 100
+        risk = price - stop
+        out["Reward/Risk"] = np.where(risk > 0, (out["Swing High"].to_numpy(dtype=float) - price) / risk,
+                                      np.nan)
+    return out
+
+
+def rank(valid, weights=None):
+    """
+    Score enriched signal rows against each other and sort them best
+    first. The Score is cross-sectional, so rank the whole table that will
+    be shown or stored, never a batch of it.
+    """
+    if valid is None or valid.empty:
+        return valid
+    out = valid.assign(Score=score(valid, weights))
+    return out.sort_values("Score", ascending=False, kind="stable").reset_index(drop=True)
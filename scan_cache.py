@@ -0,0 +1,72 @@
+import hashlib
+import threading
+
+import numpy as np
+import pandas as pd
+
+import bars
+import store
+
+# ==========================================================
+# 1. FINGERPRINTS
+# ==========================================================
+# A ticker's scan result can only change when its bars do. The fingerprint
+# catches appended bars (last timestamp, row count) and revised recent bars
+# (hash of the last TAIL_ROWS rows), without hashing the whole history.
+TAIL_ROWS = 5
+
+
+def fingerprints(df, time_col, tail=TAIL_ROWS):
+    """{ticker: (last timestamp ns, row count, tail digest)}"""
+    a, ranges = bars.load_arrays(df, time_col, ["ts"] if "ts" in df else [])
+    if not ranges:
+        return {}
+    ts = a["ts"] if "ts" in a else pd.DatetimeIndex(pd.to_datetime(a["time"], utc=True)).as_unit("ns").asi8
+    ohlcv = np.column_stack([a["open"], a["high"], a["low"], a["close"], a["volume"]])
+    out = {}
+    for ticker, (s, e) in ranges.items():
+        h = hashlib.blake2b(ts[max(s, e - tail):e].tobytes(), digest_size=16)
+        h.update(ohlcv[max(s, e - tail):e].tobytes())
+        out[ticker] = (int(ts[e - 1]), int(e - s), h.digest())
+    return out
+
+
+# ==========================================================
+# 2. CACHED SCAN
+# ==========================================================
+_lock = threading.Lock()
+last_stats = {}   # category -> {"hits": n, "misses": n} of the latest run
+
+
+def cached_scan(category, df, time_col, scan, params):
+    """
+    VALID rows of `scan(df)`, rescanning only tickers whose fingerprint or
+    `params` changed since they were last scanned. Cached per ticker in the
+    store as {ticker: (fingerprint, VALID row dict or None)}.
+    """
+    fps = fingerprints(df, time_col)
+    params_key = tuple(sorted(params.items()))
+
+    with _lock:
+        cache = store.load("scan_cache") or {}
+        entry = cache.get(category)
+        if entry is None or entry["params"] != params_key:
+            entry = {"params": params_key, "tickers": {}}
+        known = entry["tickers"]
+
+        misses = [t for t, fp in fps.items() if t not in known or known[t][0] != fp]
+        if misses:
+            fresh = scan(df[df["Ticker"].isin(misses)])
+            rows = {} if fresh.empty else {
+                r["Ticker"]: r for r in fresh.to_dict("records")}
+            for t in misses:
+                known[t] = (fps[t], rows.get(t))
+            cache[category] = entry
+            store.save("scan_cache", cache)
+
+    hits = len(fps) - len(misses)
+    last_stats[category] = {"hits": hits, "misses": len(misses)}
+    print(f"[scan cache] {category}: {hits} hits, {len(misses)} misses")
+
+    records = [known[t][1] for t in sorted(fps) if known[t][1] is not None]
+    return pd.DataFrame(records)
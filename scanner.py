@@ -1,5 +1,7 @@
 import pandas as pd
 import numpy as np
+
+import bars
 from Updater import load_all_market_data   # note the capital U
 
 # ==========================================================
@@ -25,11 +27,17 @@ def resample_weekly(df):
 # 2. SWING DETECTION
 # ==========================================================
 def find_swing(group, lookback_weeks=80):
-    window = group.tail(lookback_weeks)
-    if len(window) < 10:
+    return find_swing_arrays(group["High"].values, group["Low"].values,
+                             group["Date"].values, lookback_weeks)
+
+
+def find_swing_arrays(highs, lows, dates, lookback_weeks=80):
+    """Array core of find_swing for one ticker's weekly bars, sorted by date."""
+    highs = highs[-lookback_weeks:]
+    lows = lows[-lookback_weeks:]
+    dates = dates[-lookback_weeks:]
+    if len(highs) < 10:
         return None
-    highs = window["High"].values
-    dates = window["Date"].values
     look = 3
     pivots = []
     for i in range(look, len(highs) - look):
@@ -40,10 +48,9 @@ def find_swing(group, lookback_weeks=80):
     best_rel_idx = max(pivots, key=lambda idx: highs[idx])
     swing_high_price = float(highs[best_rel_idx])
     swing_high_date = pd.to_datetime(dates[best_rel_idx])
-    prior_segment = window.iloc[: best_rel_idx + 1]
-    low_idx = prior_segment["Low"].idxmin()
-    swing_low_price = float(group.loc[low_idx, "Low"])
-    swing_low_date = pd.to_datetime(group.loc[low_idx, "Date"])
+    low_rel_idx = int(np.argmin(lows[: best_rel_idx + 1]))
+    swing_low_price = float(lows[low_rel_idx])
+    swing_low_date = pd.to_datetime(dates[low_rel_idx])
     if swing_low_price >= swing_high_price:
         return None
     return {
@@ -57,24 +64,30 @@ def find_swing(group, lookback_weeks=80):
 # 3. WEEKLY SCANNER
 # ==========================================================
 def scan_weekly(df, lookback_weeks=80):
+    return scan_weekly_bars(resample_weekly(df), lookback_weeks)
+
+
+def scan_weekly_bars(weekly, lookback_weeks=80):
+    """scan_weekly over weekly bars that are already built (Date = week's Friday)."""
+    a, ranges = bars.load_arrays(weekly, "Date")
     results = []
-    weekly = resample_weekly(df)
-    for ticker, g in weekly.groupby("Ticker"):
-        g = g.sort_values("Date").copy()
-        latest_price = g["Close"].iloc[-1]
-        latest_date = g["Date"].iloc[-1]
-        swing = find_swing(g, lookback_weeks)
+    for ticker, (s, e) in ranges.items():
+        dates, lows = a["time"][s:e], a["low"][s:e]
+        latest_price = a["close"][e - 1]
+        latest_date = pd.Timestamp(dates[-1])
+        swing = find_swing_arrays(a["high"][s:e], lows, dates, lookback_weeks)
         if swing is None:
             continue
         swing_range = swing["Swing High Price"] - swing["Swing Low Price"]
         fib618 = swing["Swing High Price"] - 0.618 * swing_range
         fib786 = swing["Swing High Price"] - 0.786 * swing_range
-        correction = g[(g["Date"] > swing["Swing High Date"]) & (g["Date"] <= latest_date)]
-        if correction.empty:
+        later = dates > swing["Swing High Date"]
+        if not later.any():   # no correction after the swing high yet
             continue
-        retr_idx = correction["Low"].idxmin()
-        retr_low_price = correction.loc[retr_idx, "Low"]
-        retr_low_date = correction.loc[retr_idx, "Date"]
+        after = int(np.argmax(later))
+        retr_pos = after + int(np.argmin(lows[after:]))
+        retr_low_price = lows[retr_pos]
+        retr_low_date = pd.Timestamp(dates[retr_pos])
 
         # Condition 1: Fib zone
         retr_in_zone = (retr_low_price <= fib618) and (retr_low_price >= fib786)
@@ -92,6 +105,7 @@ def scan_weekly(df, lookback_weeks=80):
             "Latest Price": latest_price,
             "Swing Low": swing["Swing Low Price"],
             "Swing High": swing["Swing High Price"],
+            "Swing High Date": swing["Swing High Date"],
             "Fib618": fib618,
             "Fib786": fib786,
             "Retr Low": retr_low_price,
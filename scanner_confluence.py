@@ -0,0 +1,124 @@
+import pandas as pd
+import numpy as np
+
+import bars
+import scanner
+import scanner_daily
+import scanner_hourly
+
+# ==========================================================
+# 1. PER-TIMEFRAME FIB ZONES
+# ==========================================================
+def _weekly_zone(w, s, e, lookback_weeks):
+    swing = scanner.find_swing_arrays(w["high"][s:e], w["low"][s:e], w["time"][s:e], lookback_weeks)
+    if swing is None:
+        return None
+    rng = swing["Swing High Price"] - swing["Swing Low Price"]
+    return (swing["Swing High Price"] - 0.786 * rng, swing["Swing High Price"] - 0.618 * rng)
+
+
+def _swing_zone(detect, a, s, e, lookback):
+    sig = detect(a["low"][s:e], a["high"][s:e], a["close"][s:e], a["time"][s:e], lookback)
+    if sig is None:
+        return None
+    return (sig["Fib786"], sig["Fib618"], sig["Signal"])
+
+
+# ==========================================================
+# 2. CONFLUENCE SCANNER
+# ==========================================================
+TIMEFRAMES = ("Weekly", "Daily", "Hourly")
+
+
+def scan_confluence(daily_df, hourly_df=None, lookback_weeks=80,
+                    lookback_days=250, lookback_hours=120):
+    """
+    Fib 0.618–0.786 zones of every ticker on the weekly, daily and hourly
+    timeframes, ranked by how many of those zones overlap. Weekly bars are
+    derived from the daily arrays, so the daily frame is sorted and split
+    only once for both timeframes.
+    """
+    daily, d_ranges = bars.load_arrays(daily_df, "Date")
+    weekly, w_ranges = bars.weekly_arrays(daily, d_ranges)
+    if hourly_df is not None and not hourly_df.empty:
+        hourly, h_ranges = bars.load_arrays(hourly_df, "Datetime")
+    else:
+        hourly, h_ranges = None, {}
+
+    rows = []
+    for ticker, (s, e) in d_ranges.items():
+        zones = {}
+        signals = {}
+        z = _weekly_zone(weekly, *w_ranges[ticker], lookback_weeks)
+        if z is not None:
+            zones["Weekly"] = z
+        z = _swing_zone(scanner_daily.detect_swing_arrays, daily, s, e, lookback_days)
+        if z is not None:
+            zones["Daily"], signals["Daily"] = z[:2], z[2]
+        if ticker in h_ranges:
+            z = _swing_zone(scanner_hourly.detect_swing_arrays, hourly, *h_ranges[ticker], lookback_hours)
+            if z is not None:
+                zones["Hourly"], signals["Hourly"] = z[:2], z[2]
+        if len(zones) < 2:
+            continue
+
+        row = {"Ticker": ticker, "Current Price": daily["close"][e - 1]}
+        for tf in TIMEFRAMES:
+            lo, hi = zones.get(tf, (np.nan, np.nan))
+            row[f"{tf} Fib786"], row[f"{tf} Fib618"] = lo, hi
+        row["Daily Signal"] = signals.get("Daily")
+        row["Hourly Signal"] = signals.get("Hourly")
+        rows.append(row)
+
+    out = pd.DataFrame(rows)
+    if out.empty:
+        return out
+    return rank_confluence(out)
+
+
+def rank_confluence(out):
+    """
+    For each ticker find the largest set of timeframes whose zones share a
+    common price band, then rank by that count, the band's width and how
+    close the current price sits to it.
+    """
+    lo = out[[f"{tf} Fib786" for tf in TIMEFRAMES]].to_numpy()
+    hi = out[[f"{tf} Fib618" for tf in TIMEFRAMES]].to_numpy()
+
+    best_n = np.zeros(len(out), dtype=int)
+    best_lo = np.full(len(out), np.nan)
+    best_hi = np.full(len(out), np.nan)
+    best_tf = np.full(len(out), "", dtype=object)
+    for combo in ((0, 1, 2), (0, 1), (1, 2), (0, 2)):
+        c_lo = lo[:, combo].max(axis=1)
+        c_hi = hi[:, combo].min(axis=1)
+        ok = (c_lo <= c_hi) & (len(combo) > best_n)   # NaN compares False
+        best_n[ok] = len(combo)
+        best_lo[ok], best_hi[ok] = c_lo[ok], c_hi[ok]
+        best_tf[ok] = "+".join(TIMEFRAMES[i] for i in combo)
+
+    price = out["Current Price"].to_numpy()
+    out["Timeframes Aligned"] = best_n
+    out["Aligned"] = best_tf
+    out["Zone Low"], out["Zone High"] = best_lo, best_hi
+    out["Zone Width %"] = (best_hi - best_lo) / price * 100
+    out["Distance %"] = np.where(
+        price > best_hi, (price - best_hi) / price * 100,
+        np.where(price < best_lo, (best_lo - price) / price * 100, 0.0),
+    )
+    out = out[out["Timeframes Aligned"] >= 2]
+    return out.sort_values(["Timeframes Aligned", "Distance %", "Zone Width %"],
+                           ascending=[False, True, False]).reset_index(drop=True)
+
+
+# ==========================================================
+# 3. SELF-TEST (EXPORT ONLY)
+# ==========================================================
+if __name__ == "__main__":
+    from updater_daily import load_all_daily_data
+    from updater_hourly import load_all_hourly_data
+
+    ranked = scan_confluence(load_all_daily_data(), load_all_hourly_data())
+    print(ranked.head(25))
+    ranked.to_excel("confluence_signals.xlsx", index=False)
+    print(f"Exported {len(ranked)} confluence tickers to confluence_signals.xlsx")
@@ -8,11 +8,20 @@ def detect_swing_and_retrace(df, lookback_hours=120):
     and check if current price is within +3% of retrace low.
     """
     df = df.sort_values("Datetime").reset_index(drop=True)
+    return detect_swing_arrays(
+        df["Low"].to_numpy(dtype=float),
+        df["High"].to_numpy(dtype=float),
+        df["Close"].to_numpy(dtype=float),
+        df["Datetime"].to_numpy(),
+        lookback_hours,
+    )
 
-    lows = df["Low"].to_numpy(dtype=float)
-    highs = df["High"].to_numpy(dtype=float)
-    closes = df["Close"].to_numpy(dtype=float)
 
+def detect_swing_arrays(lows, highs, closes, times, lookback_hours=120):
+    """
+    Array core of detect_swing_and_retrace for one ticker's bars,
+    already sorted by time.
+    """
     if len(lows) < lookback_hours:
         return None
 
@@ -28,6 +37,7 @@ def detect_swing_and_retrace(df, lookback_hours=120):
     swing_high_idx = np.argmax(window_highs)
     swing_high_price = window_highs[swing_high_idx]
     swing_high_pos = recent_low_pos + swing_high_idx
+    swing_high_date = pd.Timestamp(times[swing_high_pos])
 
     # Step 3: Fibonacci retracement levels
     fib618 = swing_high_price - 0.618 * (swing_high_price - recent_low_price)
@@ -50,6 +60,7 @@ def detect_swing_and_retrace(df, lookback_hours=120):
         return {
             "Swing Low": recent_low_price,
             "Swing High": swing_high_price,
+            "Swing High Date": swing_high_date,
             "Fib618": fib618,
             "Fib786": fib786,
             "Retr Low": retr_low,
@@ -60,6 +71,7 @@ def detect_swing_and_retrace(df, lookback_hours=120):
         return {
             "Swing Low": recent_low_price,
             "Swing High": swing_high_price,
+            "Swing High Date": swing_high_date,
             "Fib618": fib618,
             "Fib786": fib786,
             "Retr Low": retr_low if retr_segment.size > 0 else None,
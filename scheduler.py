@@ -0,0 +1,218 @@
+import queue
+import threading
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+import pandas as pd
+
+import pipeline
+import pyramid
+import signal_diff
+import store
+from sessions import SESSIONS
+from Updater import (get_sp500_universe, get_hsi_universe, get_eurostoxx50_universe,
+                     get_nasdaq_universe, get_russell3000_universe)
+
+# ==========================================================
+# 1. TRADING SESSIONS
+# ==========================================================
+# Regular sessions (exchange-local) are defined in sessions.py.
+# Only universes with a session there are refreshed on a schedule; the
+# large US universes are run on demand (chunked.py, cli.py).
+UNIVERSE_BUILDERS = {
+    "SP500": get_sp500_universe,
+    "HSI": get_hsi_universe,
+    "EuroStoxx50": get_eurostoxx50_universe,
+    "NASDAQ": get_nasdaq_universe,
+    "Russell3000": get_russell3000_universe,
+}
+
+# Give Yahoo a few minutes to publish a bar after it closes.
+SETTLE = timedelta(minutes=5)
+
+
+def _at(day, hhmm, tz):
+    h, m = map(int, hhmm.split(":"))
+    return datetime(day.year, day.month, day.day, h, m, tzinfo=tz)
+
+
+def bar_bounds(universe, day, timeframe):
+    """
+    (open, close) times (tz-aware, exchange-local) of the bars for
+    `universe` on local date `day`. Hourly bars are anchored at each segment
+    start and the last bar of a segment may be short; the daily bar spans
+    the whole session.
+    """
+    if day.weekday() >= 5:
+        return []
+    session = SESSIONS[universe]
+    tz = ZoneInfo(session["tz"])
+    if timeframe == "daily":
+        return [(_at(day, session["segments"][0][0], tz),
+                 _at(day, session["segments"][-1][1], tz))]
+
+    bounds = []
+    for start, end in session["segments"]:
+        t, end = _at(day, start, tz), _at(day, end, tz)
+        while t < end:
+            bounds.append((t, min(t + timedelta(hours=1), end)))
+            t = bounds[-1][1]
+    return bounds
+
+
+def bar_closes(universe, day, timeframe):
+    """Close times of the bars for `universe` on local date `day`."""
+    return [close for _, close in bar_bounds(universe, day, timeframe)]
+
+
+def next_run(universe, timeframe, after):
+    """First time strictly after `after` at which a new bar can be fetched."""
+    tz = ZoneInfo(SESSIONS[universe]["tz"])
+    day = after.astimezone(tz).date()
+    for offset in range(8):
+        for close in bar_closes(universe, day + timedelta(days=offset), timeframe):
+            if close + SETTLE > after:
+                return (close + SETTLE).astimezone(timezone.utc)
+    return None
+
+
+# ==========================================================
+# 2. REFRESH JOBS
+# ==========================================================
+# bar timeframe -> bar sets refreshed when such a bar closes
+REFRESH_JOBS = {
+    "hourly": ["hourly_data"],
+    "daily": ["market_data", "daily_data"],
+}
+
+_universes = {}
+_universe_lock = threading.Lock()
+
+
+def get_universe(label):
+    """Scrape a universe once per process and keep the table in the store."""
+    with _universe_lock:
+        if label not in _universes:
+            _universes[label] = UNIVERSE_BUILDERS[label]()
+            table = pd.concat(
+                [u.assign(Index=name) for name, u in _universes.items()],
+                ignore_index=True,
+            )
+            store.save("universes", table)
+        return _universes[label]
+
+
+def refresh(timeframe, universe):
+    """Download one universe for one timeframe, rescan, and prewarm the store."""
+    tickers = get_universe(universe)["Ticker"].tolist()
+    bars = {}
+    with store.copy_counter() as downloaded:
+        for key in REFRESH_JOBS[timeframe]:
+            download, period = pipeline.DOWNLOADS[key]
+            frames = download(tickers, universe, period=period)
+            if not frames:
+                continue
+            for frame in frames:
+                store.count_copies(frame)
+            bars[key] = store.replace_universe(key, universe, frames, pipeline.BAR_KEYS[key])
+    if not bars:
+        print(f"[scheduler] {timeframe}/{universe}: nothing downloaded")
+        return
+
+    # Scan and diff only this universe: the other universes' signals (and
+    # whether they are NEW) stay as their own last refresh left them
+    with store.copy_counter() as scanned:
+        own = {key: df[df["Index"] == universe] for key, df in bars.items()}
+        signal_diff.record_partial_run(pipeline.run_scanners(own), tickers)
+    with store.copy_counter() as confluence_copied:
+        confluence = pipeline.run_confluence(
+            {key: store.load(key) for key in ("daily_data", "hourly_data")})
+        if confluence is not None:
+            store.save("confluence", confluence)
+    store.prewarm(pipeline.BAR_KEYS)
+    pyramid.refresh(bars)
+    print(f"[scheduler] {timeframe}/{universe}: refreshed {', '.join(bars)} "
+          f"(copied {downloaded['bytes'] / 2**20:.1f} MB downloading, "
+          f"{scanned['bytes'] / 2**20:.1f} MB to scan, "
+          f"{confluence_copied['bytes'] / 2**20:.1f} MB for confluence)")
+
+
+# ==========================================================
+# 3. BACKGROUND DAEMON
+# ==========================================================
+_requests = queue.Queue()
+_wakeup = threading.Event()
+_thread = None
+_last_run = {}   # (timeframe, universe) -> UTC datetime of last successful refresh
+
+
+def request_refresh(universes=None, timeframes=None):
+    """Queue an immediate refresh; returns at once."""
+    for tf in timeframes or REFRESH_JOBS:
+        for u in universes or SESSIONS:
+            _requests.put((tf, u))
+    _wakeup.set()
+
+
+def status():
+    return {
+        "last_run": dict(_last_run),
+        "pending": _requests.qsize(),
+        "running": _thread is not None and _thread.is_alive(),
+    }
+
+
+def _run_job(tf, universe):
+    try:
+        refresh(tf, universe)
+        _last_run[(tf, universe)] = datetime.now(timezone.utc)
+    except Exception as e:
+        print(f"[scheduler] {tf}/{universe} failed: {e}")
+
+
+def run_forever(stop_event=None):
+    stop_event = stop_event or threading.Event()
+
+    # Bootstrap: an empty store gets a full refresh straight away.
+    if any(store.version(key) is None for key in pipeline.BAR_KEYS):
+        request_refresh()
+
+    now = datetime.now(timezone.utc)
+    due = {(tf, u): next_run(u, tf, now) for tf in REFRESH_JOBS for u in SESSIONS}
+
+    while not stop_event.is_set():
+        _wakeup.clear()
+        while not _requests.empty():
+            _run_job(*_requests.get())
+
+        now = datetime.now(timezone.utc)
+        for job, when in sorted(due.items(), key=lambda kv: kv[1]):
+            if when <= now:
+                _run_job(*job)
+                due[job] = next_run(job[1], job[0], datetime.now(timezone.utc))
+
+        wait = (min(due.values()) - datetime.now(timezone.utc)).total_seconds()
+        _wakeup.wait(timeout=max(1.0, min(wait, 3600.0)))
+
+
+def start_background():
+    """Start the refresh daemon once per process and return its thread."""
+    global _thread
+    if _thread is None or not _thread.is_alive():
+        _thread = threading.Thread(target=run_forever, name="refresh-scheduler", daemon=True)
+        _thread.start()
+    return _thread
+
+
+# ==========================================================
+# 4. STANDALONE
+# ==========================================================
+if __name__ == "__main__":
+    now = datetime.now(timezone.utc)
+    for tf in REFRESH_JOBS:
+        for u in SESSIONS:
+            print(f"next {tf:6s} {u:12s} {next_run(u, tf, now)}")
+    try:
+        run_forever()
+    except KeyboardInterrupt:
+        print("[scheduler] stopped")
@@ -0,0 +1,128 @@
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+# ==========================================================
+# 1. TRADING SESSIONS
+# ==========================================================
+# Regular sessions in exchange-local time. HSI breaks for lunch, so its
+# hourly bars restart at 13:00. Exchange holidays are not modelled: a
+# refresh on a holiday simply downloads the same bars again.
+SESSIONS = {
+    "SP500": {"tz": "America/New_York", "segments": [("09:30", "16:00")]},
+    "HSI": {"tz": "Asia/Hong_Kong", "segments": [("09:30", "12:00"), ("13:00", "16:00")]},
+    "EuroStoxx50": {"tz": "Europe/Berlin", "segments": [("09:00", "17:30")]},
+}
+
+# Session id stored with every bar (int8 "session" column)
+SESSION_IDS = {name: i for i, name in enumerate(SESSIONS)}
+
+# Universes without a session of their own trade in another's
+UNIVERSE_SESSIONS = {"NASDAQ": "SP500", "Russell3000": "SP500"}
+
+DEFAULT_SESSION = "SP500"
+
+
+def session_ids(universes):
+    """int8 session id of each bar from its universe label ("Index" column)."""
+    labels = pd.Series(universes, copy=False)
+    ids = {u: SESSION_IDS[UNIVERSE_SESSIONS.get(u, u)]
+           for u in labels.unique() if UNIVERSE_SESSIONS.get(u, u) in SESSION_IDS}
+    return labels.map(ids).fillna(SESSION_IDS[DEFAULT_SESSION]).to_numpy(dtype=np.int8)
+
+
+# ==========================================================
+# 2. SESSION CALENDAR
+# ==========================================================
+# Built once per session for every calendar day in range; all timestamp
+# conversions below are searchsorted lookups into these arrays.
+CALENDAR_START = "1990-01-01"
+CALENDAR_END = "2045-12-31"
+
+
+@lru_cache(maxsize=None)
+def calendar(session_id):
+    """
+    {"day": local midnight as naive ns, "day_utc": the same instant in UTC ns,
+    "offset": UTC offset ns that day (at noon, so DST switches in the small
+    hours never land inside a session), "trading": weekday flag,
+    "open"/"close": UTC ns of the first segment open and last segment close}
+    """
+    name = list(SESSIONS)[session_id]
+    tz = SESSIONS[name]["tz"]
+    days = pd.date_range(CALENDAR_START, CALENDAR_END, freq="D")
+    segments = SESSIONS[name]["segments"]
+
+    def utc_at(hhmm):
+        return (days + pd.Timedelta(f"{hhmm}:00")).tz_localize(tz).as_unit("ns").asi8
+
+    day = days.as_unit("ns").asi8
+    return {
+        "day": day,
+        "day_utc": days.tz_localize(tz).as_unit("ns").asi8,
+        "offset": (day + 12 * 3_600 * 10**9) - utc_at("12:00"),
+        "trading": days.weekday < 5,
+        "open": utc_at(segments[0][0]),
+        "close": utc_at(segments[-1][1]),
+    }
+
+
+def _offsets(ns, session, edges_key):
+    """UTC offset of each timestamp in `ns` (looked up by day in `edges_key`)."""
+    out = np.zeros(len(ns), dtype=np.int64)
+    for sid in np.unique(session):
+        cal = calendar(int(sid))
+        mask = session == sid
+        i = np.searchsorted(cal[edges_key], ns[mask], side="right") - 1
+        out[mask] = cal["offset"][np.clip(i, 0, len(cal["offset"]) - 1)]
+    return out
+
+
+def local_ns(ts, session):
+    """Exchange-local wall-clock ns of UTC ns timestamps `ts`."""
+    return ts + _offsets(ts, session, "day_utc")
+
+
+def utc_ns(wall, session):
+    """UTC ns of exchange-local wall-clock ns `wall`."""
+    return wall - _offsets(wall, session, "day")
+
+
+# ==========================================================
+# 3. LOAD-TIME NORMALIZATION
+# ==========================================================
+def to_utc_ns(times, session):
+    """
+    int64 UTC ns of a time column as it comes from yfinance: tz-aware (one
+    zone, or several as object values after a cross-market concat) or naive
+    exchange-local.
+    """
+    col = pd.Series(times, copy=False)
+    if col.dtype == object or getattr(col.dtype, "tz", None) is not None:
+        try:
+            return pd.DatetimeIndex(pd.to_datetime(col, utc=True)).as_unit("ns").asi8
+        except (TypeError, ValueError):
+            pass   # naive values in an object column
+    wall = pd.DatetimeIndex(pd.to_datetime(col)).as_unit("ns").asi8
+    return utc_ns(wall, session)
+
+
+def normalize(df, time_col):
+    """
+    Give a bar frame the integer time axis every later stage works on:
+    "ts" (UTC ns), "session" (int8 id) and `time_col` as naive
+    exchange-local time, so frames from different exchanges concatenate,
+    sort and merge without mixed-timezone object columns. Frames that
+    already carry "ts" are returned as they are.
+    """
+    if "ts" in df:
+        return df
+    df = df.copy()
+    session = session_ids(df["Index"]) if "Index" in df else \
+        np.full(len(df), SESSION_IDS[DEFAULT_SESSION], dtype=np.int8)
+    ts = to_utc_ns(df[time_col], session)
+    df[time_col] = local_ns(ts, session).view("datetime64[ns]")
+    df["ts"] = ts
+    df["session"] = session
+    return df
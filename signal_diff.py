@@ -0,0 +1,122 @@
+import pandas as pd
+
+import ranking
+import store
+
+# ==========================================================
+# 1. SIGNAL KEYS
+# ==========================================================
+# A signal is the same signal across runs while its ticker, timeframe and
+# swing high stay the same; a new swing high makes it a new signal.
+KEY_COLUMNS = ["Ticker", "Swing High Date"]
+
+
+def _keys(df):
+    if df is None or df.empty:
+        return pd.MultiIndex.from_arrays([[], []], names=KEY_COLUMNS)
+    return pd.MultiIndex.from_arrays(
+        [df["Ticker"], pd.to_datetime(df["Swing High Date"])], names=KEY_COLUMNS
+    )
+
+
+# ==========================================================
+# 2. DIFF ONE TIMEFRAME
+# ==========================================================
+def diff_frames(previous, current):
+    """
+    Split the VALID rows of one timeframe into new / still valid (taken from
+    `current`) and invalidated (taken from `previous`).
+    """
+    prev_keys, cur_keys = _keys(previous), _keys(current)
+    empty = pd.DataFrame()
+    if current is None or current.empty:
+        new = still = empty
+    else:
+        seen = cur_keys.isin(prev_keys)
+        new, still = current[~seen], current[seen]
+    if previous is None or previous.empty:
+        gone = empty
+    else:
+        gone = previous[~prev_keys.isin(cur_keys)]
+    return {"new": new, "still_valid": still, "invalidated": gone}
+
+
+# ==========================================================
+# 3. PERSISTED RUNS
+# ==========================================================
+def record_run(updates):
+    """
+    Merge freshly scanned timeframes `updates` ({category: VALID rows}) into
+    the stored signals and diff only those timeframes against the previous
+    run; timeframes that were not rescanned keep their earlier diff. Stored
+    rows are ranked (ranking.rank) over each stored table, whichever path
+    scanned them. Returns the full {category: {change: rows}} mapping.
+    """
+    updates = {category: ranking.rank(current) for category, current in updates.items()}
+    with store.write_lock:
+        previous = store.load("signals") or {}
+        diffs = dict(store.load("signal_diff") or {})
+        for category, current in updates.items():
+            diffs[category] = diff_frames(previous.get(category), current)
+
+        store.save("signals", {**previous, **updates})
+        store.save("signal_diff", diffs)
+    return diffs
+
+
+def _concat(parts):
+    parts = [p for p in parts if p is not None and not p.empty]
+    return pd.concat(parts, ignore_index=True) if parts else pd.DataFrame()
+
+
+def _without(df, tickers):
+    return df if df is None or df.empty else df[~df["Ticker"].isin(tickers)]
+
+
+def _rows_of(ranked, rows):
+    """The rows of `ranked` that `rows` holds, keyed by KEY_COLUMNS, in rank order."""
+    if rows.empty or ranked is None or ranked.empty:
+        return rows
+    return ranked[_keys(ranked).isin(_keys(rows))].reset_index(drop=True)
+
+
+def record_partial_run(updates, tickers):
+    """
+    record_run() for a run that only covered `tickers` (one universe, say):
+    only their signals are diffed. Every other ticker keeps its stored
+    signals and its part of the previous diff, so a signal that came up
+    NEW in one universe's refresh stays NEW until that universe is
+    refreshed again. The merged table is ranked as a whole, and the new
+    and still valid rows carry its Scores.
+    """
+    tickers = set(tickers)
+    with store.write_lock:
+        previous = store.load("signals") or {}
+        diffs = dict(store.load("signal_diff") or {})
+        merged = {}
+        for category, current in updates.items():
+            old = previous.get(category)
+            merged[category] = ranking.rank(_concat([_without(old, tickers), current]))
+            covered = None if old is None or old.empty else old[old["Ticker"].isin(tickers)]
+            diff = diff_frames(covered, current)
+            kept = diffs.get(category)
+            if kept is not None:
+                diff = {change: _concat([_without(kept[change], tickers), rows])
+                        for change, rows in diff.items()}
+            for change in ("new", "still_valid"):
+                diff[change] = _rows_of(merged[category], diff[change])
+            diffs[category] = diff
+
+        store.save("signals", {**previous, **merged})
+        store.save("signal_diff", diffs)
+    return diffs
+
+
+def changes_table(diff):
+    """New and invalidated rows of one timeframe as one table with a Change column."""
+    parts = [diff[c].assign(Change=label) for c, label in
+             (("new", "NEW"), ("invalidated", "INVALIDATED")) if not diff[c].empty]
+    if not parts:
+        return pd.DataFrame()
+    out = pd.concat(parts, ignore_index=True)
+    return out[["Change"] + [c for c in out.columns if c != "Change"]]
@@ -0,0 +1,125 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+import signal_diff
+import store
+
+# ==========================================================
+# 1. SETTINGS
+# ==========================================================
+PAGE_SIZE = 50
+CACHE_SIZE = 128
+
+# Store entries a signal table is built from; their versions key the cache
+SOURCES = ("signals", "signal_diff", "universes")
+
+
+# ==========================================================
+# 2. ENRICHMENT
+# ==========================================================
+def with_universe_info(df):
+    """Add the Index and Sector of each ticker from the stored universes table."""
+    universes = store.load("universes")
+    if universes is None or df.empty:
+        return df
+    info = universes.drop_duplicates("Ticker").set_index("Ticker")
+    df = df.copy()
+    for col in ("Index", "Sector"):
+        if col in info:
+            df[col] = df["Ticker"].map(info[col])
+    return df
+
+
+def zone_distance(df):
+    """
+    % distance of Current Price from the 0.618–0.786 fib zone: 0 inside the
+    zone, positive above it, negative below it.
+    """
+    price = df["Current Price"].to_numpy(dtype=float)
+    top = df["Fib618"].to_numpy(dtype=float)
+    bottom = df["Fib786"].to_numpy(dtype=float)
+    return np.where(price > top, (price / top - 1) * 100,
+                    np.where(price < bottom, (price / bottom - 1) * 100, 0.0))
+
+
+def _table(category, changes_only):
+    if changes_only:
+        diff = (store.load("signal_diff") or {}).get(category)
+        df = pd.DataFrame() if diff is None else signal_diff.changes_table(diff)
+    else:
+        df = (store.load("signals") or {}).get(category, pd.DataFrame())
+    if df.empty:
+        return df
+    df = with_universe_info(df)
+    df["Distance %"] = zone_distance(df)
+    return df
+
+
+# ==========================================================
+# 3. FILTERED, SORTED QUERIES
+# ==========================================================
+_lock = threading.Lock()
+_results = OrderedDict()   # (query, store versions) -> filtered and sorted rows
+
+
+def query(category, changes_only=False, index=None, sector=None, max_distance=None,
+          sort_by="Score", ascending=False):
+    """
+    Every row of one timeframe's signal table that passes the filters,
+    sorted. `max_distance` keeps rows within that many % of the fib zone.
+    Built at most once per store version of SOURCES.
+    """
+    key = (category, changes_only, index, sector, max_distance, sort_by, ascending,
+           tuple(store.version(name) for name in SOURCES))
+    with _lock:
+        if key in _results:
+            _results.move_to_end(key)
+            return _results[key]
+
+    df = _table(category, changes_only)
+    if not df.empty:
+        mask = np.ones(len(df), dtype=bool)
+        if index is not None and "Index" in df:
+            mask &= (df["Index"] == index).to_numpy()
+        if sector is not None and "Sector" in df:
+            mask &= (df["Sector"] == sector).to_numpy()
+        if max_distance is not None:
+            mask &= np.abs(df["Distance %"].to_numpy()) <= max_distance
+        df = df[mask]
+        if sort_by in df:
+            df = df.sort_values(sort_by, ascending=ascending, kind="stable", key=_sort_key(sort_by))
+        df = df.reset_index(drop=True)
+
+    with _lock:
+        _results[key] = df
+        while len(_results) > CACHE_SIZE:
+            _results.popitem(last=False)
+    return df
+
+
+def _sort_key(column):
+    # distance sorts by how far from the zone, whichever side
+    return (lambda s: s.abs()) if column == "Distance %" else None
+
+
+def page(category, page_number=0, page_size=PAGE_SIZE, **filters):
+    """
+    One page of query(category, **filters) as (rows, total rows, page count);
+    only this slice needs to reach the browser.
+    """
+    df = query(category, **filters)
+    pages = max(1, -(-len(df) // page_size))
+    page_number = min(max(page_number, 0), pages - 1)
+    start = page_number * page_size
+    return df.iloc[start:start + page_size], len(df), pages
+
+
+def options(column):
+    """Distinct values of a universes column (Index, Sector) for filter widgets."""
+    universes = store.load("universes")
+    if universes is None or column not in universes:
+        return []
+    return sorted(universes[column].dropna().unique().tolist())
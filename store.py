@@ -0,0 +1,285 @@
+import contextlib
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+import sessions
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc  # noqa: F401
+except ImportError:
+    pa = None
+
+# ==========================================================
+# 1. LOCATION
+# ==========================================================
+# Everything the background refresh produces (bars, signals, universes)
+# lands here so the dashboard and scripts can read it without downloading.
+STORE_DIR = os.environ.get(
+    "TRADING_STORE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data"),
+)
+
+# DataFrames are written as Arrow IPC files when pyarrow is installed and
+# memory-mapped on load, so their columns come back as read-only views of
+# the file instead of unpickled copies. Everything else (and every frame
+# without pyarrow) is pickled.
+ARROW = pa is not None
+
+# Windows cannot replace a file that is still mapped; there Arrow files are
+# read into memory once instead (still without any conversion copies).
+MMAP = os.name != "nt"
+
+_lock = threading.RLock()
+# Held across every load -> modify -> save of a shared entry (bar sets,
+# signals), so the scheduler thread and the dashboard thread never drop
+# each other's update. Re-entrant: writers call each other.
+write_lock = threading.RLock()
+_cache = {}   # name -> (version, object); shared by every reader in the process
+_mapped = {}  # path -> (start, end) address range of its live memory map
+
+
+def _path(name, ext="pkl"):
+    return os.path.join(STORE_DIR, f"{name}.{ext}")
+
+
+def _existing(name):
+    """Path `name` was last saved to, in whichever format (None if never saved)."""
+    for ext in ("arrow", "pkl") if ARROW else ("pkl",):
+        if os.path.exists(_path(name, ext)):
+            return _path(name, ext)
+    return None
+
+
+def version(name):
+    """Return a cheap version stamp for `name` (None when it was never saved)."""
+    for ext in ("arrow", "pkl") if ARROW else ("pkl",):
+        try:
+            return os.stat(_path(name, ext)).st_mtime_ns
+        except FileNotFoundError:
+            pass
+    return None
+
+
+# ==========================================================
+# 2. READ / WRITE
+# ==========================================================
+def _write_arrow(obj, tmp):
+    # one record batch: a file of many batches (say, Ticker strings built
+    # from per-ticker pieces) would have to be concatenated again on load
+    table = pa.Table.from_pandas(obj).combine_chunks()
+    with pa.OSFile(tmp, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+
+
+def _read(path):
+    if not path.endswith(".arrow"):
+        return pd.read_pickle(path)
+    if MMAP:
+        source = pa.memory_map(path)
+        whole = source.read_buffer(source.size())   # zero-copy: the map itself
+        _mapped[path] = (whole.address, whole.address + whole.size)
+        source.seek(0)
+    else:
+        source = pa.OSFile(path)
+    # split_blocks keeps every column its own view of the Arrow buffers
+    return pa.ipc.open_file(source).read_all().to_pandas(split_blocks=True)
+
+
+def save(name, obj, cache=True):
+    """
+    Write `obj` under `name` ("a/b" names nest in subdirectories). Pass
+    cache=False for large partitions that should not stay in memory.
+    Cached frames are the mapped file, so the caller's in-memory copy can
+    be dropped.
+    """
+    os.makedirs(os.path.dirname(_path(name)), exist_ok=True)
+    ext = "pkl"
+    if ARROW and isinstance(obj, pd.DataFrame):
+        try:
+            _write_arrow(obj, _path(name, "arrow") + ".tmp")
+            ext = "arrow"
+        except (pa.ArrowException, TypeError, ValueError):
+            # columns Arrow cannot type (mixed objects) stay pickled
+            if os.path.exists(_path(name, "arrow") + ".tmp"):
+                os.remove(_path(name, "arrow") + ".tmp")
+    tmp = _path(name, ext) + ".tmp"
+    if ext == "pkl":
+        pd.to_pickle(obj, tmp)
+    with _lock:
+        os.replace(tmp, _path(name, ext))   # readers never see a half-written file
+        try:
+            os.remove(_path(name, "arrow" if ext == "pkl" else "pkl"))
+        except FileNotFoundError:
+            pass
+        if cache:
+            _cache[name] = (version(name), _read(_path(name, ext)) if ext == "arrow" else obj)
+        else:
+            _cache.pop(name, None)
+
+
+def load(name, cache=True):
+    path = _existing(name)
+    if path is None:
+        return None
+    v = version(name)
+    with _lock:
+        hit = _cache.get(name)
+        if hit is not None and hit[0] == v:
+            return hit[1]
+    obj = _read(path)
+    if isinstance(obj, pd.DataFrame):
+        count_copies(obj)
+    if cache:
+        with _lock:
+            _cache[name] = (v, obj)
+    return obj
+
+
+def delete(name):
+    with _lock:
+        _cache.pop(name, None)
+    for ext in ("arrow", "pkl"):
+        try:
+            os.remove(_path(name, ext))
+        except FileNotFoundError:
+            pass
+
+
+def names(prefix):
+    """Saved names under directory `prefix`, sorted."""
+    root = os.path.join(STORE_DIR, prefix)
+    if not os.path.isdir(root):
+        return []
+    return sorted(f"{prefix}/{os.path.splitext(f)[0]}" for f in os.listdir(root)
+                  if f.endswith((".pkl", ".arrow")))
+
+
+def prewarm(keys):
+    """Pull `keys` into the in-process cache so the next reader pays nothing."""
+    for name in keys:
+        load(name)
+
+
+# ==========================================================
+# 3. COPY ACCOUNTING
+# ==========================================================
+# Stages that take data out of the store (load, bars.load_arrays, the CLI's
+# universe selection) report what they had to copy with count_copies();
+# it lands in every copy_counter() the calling thread has open, so the
+# scheduler thread and the dashboard thread never count each other's copies.
+_counters = threading.local()
+
+
+@contextlib.contextmanager
+def copy_counter():
+    """
+    Bytes the calling thread copies inside the block:
+        with store.copy_counter() as copied: ...
+    leaves the total in copied["bytes"]. Counters nest.
+    """
+    tally = {"bytes": 0}
+    open_tallies = _counters.__dict__.setdefault("open", [])
+    open_tallies.append(tally)
+    try:
+        yield tally
+    finally:
+        open_tallies.remove(tally)
+
+
+def _mapped_bytes(address, size):
+    return any(lo <= address and address + size <= hi for lo, hi in _mapped.values())
+
+
+def copied_bytes(obj):
+    """
+    Bytes of a frame's columns (or of a dict / list of arrays) that live in
+    process memory rather than in a memory-mapped store file: 0 for
+    columns loaded zero-copy, their full size for anything unpickled,
+    sorted or filtered on the way.
+    """
+    if isinstance(obj, pd.DataFrame):
+        arrays = [obj[c].array for c in obj.columns]
+    else:
+        arrays = list(obj.values()) if isinstance(obj, dict) else list(obj)
+    total = 0
+    for arr in arrays:
+        if pa is not None and hasattr(arr, "__arrow_array__"):   # Arrow-backed strings and the like
+            chunked = arr.__arrow_array__()
+            for chunk in getattr(chunked, "chunks", [chunked]):
+                for buf in chunk.buffers():
+                    if buf is not None and not _mapped_bytes(buf.address, buf.size):
+                        total += buf.size
+            continue
+        values = np.asarray(arr)
+        if values.dtype == object or not _mapped_bytes(values.__array_interface__["data"][0],
+                                                       values.nbytes):
+            total += values.nbytes
+    return total
+
+
+def count_copies(obj):
+    """Add copied_bytes(obj) to the calling thread's open copy counters (free with none open)."""
+    tallies = getattr(_counters, "open", None)
+    if not tallies:
+        return 0
+    n = copied_bytes(obj)
+    for tally in tallies:
+        tally["bytes"] += n
+    return n
+
+
+# ==========================================================
+# 4. PER-UNIVERSE MERGE
+# ==========================================================
+def replace_universe(name, label, frames, time_col):
+    """
+    Swap the rows of one universe (the "Index" column) in bar set `name`
+    for freshly downloaded `frames`, leaving the other universes untouched.
+    New rows are normalized (sessions.normalize) before they are merged.
+    """
+    with write_lock:
+        parts = []
+        existing = load(name)
+        if existing is not None:
+            existing = sessions.normalize(existing, time_col)
+            parts.append(existing[existing["Index"] != label])
+        if frames:
+            parts.append(sessions.normalize(pd.concat(frames, ignore_index=True), time_col))
+        if not parts:
+            return None
+
+        combined = pd.concat(parts, ignore_index=True)
+        combined = combined.sort_values(["Ticker", "ts"], kind="stable").reset_index(drop=True)
+        save(name, combined)
+        return load(name)
+
+
+def _period(period):
+    """A Yahoo download period ("730d") as a Timedelta."""
+    if not period.endswith("d") or not period[:-1].isdigit():
+        raise ValueError(f"period {period!r}: only day periods such as '730d' are supported")
+    return pd.Timedelta(days=int(period[:-1]))
+
+
+def append_rows(name, df, time_col, period=None):
+    """
+    Add new bars to bar set `name`; a bar sent again replaces the stored one.
+    With `period` (a download period such as "730d"), each ticker then keeps
+    only the bars within that period of its latest bar, the window a full
+    download of that period would hold.
+    """
+    with write_lock:
+        parts = [sessions.normalize(p, time_col) for p in (load(name), df) if p is not None]
+        combined = pd.concat(parts, ignore_index=True)
+        combined = (combined.drop_duplicates(["Ticker", "ts"], keep="last")
+                    .sort_values(["Ticker", "ts"], kind="stable").reset_index(drop=True))
+        if period is not None:
+            ts = combined["ts"].to_numpy()
+            latest = combined.groupby("Ticker", sort=False)["ts"].transform("max").to_numpy()
+            combined = combined[ts >= latest - _period(period).value].reset_index(drop=True)
+        save(name, combined)
+        return load(name)
@@ -0,0 +1,72 @@
+import pandas as pd
+
+import pipeline
+import scheduler
+import signal_diff
+import store
+
+# ==========================================================
+# 1. BATCH-BY-BATCH SCAN
+# ==========================================================
+def stream_signals(universes=None, keys=tuple(pipeline.BAR_KEYS)):
+    """
+    Download, normalize and scan one Yahoo batch at a time, yielding an
+    event per batch as soon as it is scanned:
+        {"key", "category", "universe", "batch", "bars", "valid"}
+    Every scanner works ticker by ticker, so scanning a batch gives the
+    same rows as scanning the merged universe. "valid" rows are enriched
+    but not yet scored: their Score comes from ranking.rank over the
+    stored table once the run is recorded.
+    """
+    for label in universes or scheduler.SESSIONS:
+        tickers = scheduler.get_universe(label)["Ticker"].tolist()
+        for key in keys:
+            category, scan = pipeline.SCANS[key]
+            period = pipeline.DOWNLOADS[key][1]
+            batches = pipeline.BATCHES[key](tickers, label, period=period)
+            for n, (frames, failed) in enumerate(batches):
+                if not frames:
+                    continue
+                bars = pipeline.merge_frames(frames, pipeline.BAR_KEYS[key])
+                yield {"key": key, "category": category, "universe": label,
+                       "batch": n, "bars": bars, "valid": scan(bars)}
+
+
+# ==========================================================
+# 2. STREAM + PERSIST
+# ==========================================================
+def stream_and_store(universes=None, keys=tuple(pipeline.BAR_KEYS)):
+    """
+    Pass through stream_signals() events while writing each finished
+    (universe, bar set) to the store, then record the run's signals.
+    """
+    pending = []
+    current = None
+    found = {pipeline.SCANS[key][0]: [] for key in keys}
+
+    def flush():
+        if current is not None and pending:
+            key, label = current
+            store.replace_universe(key, label, pending, pipeline.BAR_KEYS[key])
+        pending.clear()
+
+    for event in stream_signals(universes, keys):
+        if (event["key"], event["universe"]) != current:
+            flush()
+            current = (event["key"], event["universe"])
+        pending.append(event["bars"])
+        if not event["valid"].empty:
+            found[event["category"]].append(event["valid"])
+        yield event
+    flush()
+
+    # Signals of universes that were not part of this stream stay as they were
+    refreshed = set()
+    for label in universes or scheduler.SESSIONS:
+        refreshed.update(scheduler.get_universe(label)["Ticker"])
+    signal_diff.record_partial_run(
+        {category: pd.concat(parts, ignore_index=True) if parts else pd.DataFrame()
+         for category, parts in found.items()},
+        refreshed,
+    )
+    store.prewarm(pipeline.BAR_KEYS)
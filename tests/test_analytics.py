@@ -0,0 +1,27 @@
+import pytest
+
+import analytics
+import store
+
+COLUMNS = analytics.TRADE_DATES + list(analytics.TRADE_DTYPES)
+
+
+@pytest.fixture(autouse=True)
+def scratch_store(tmp_path, monkeypatch):
+    # load_trades caches parsed logs in the store; keep them out of the real one
+    monkeypatch.setattr(store, "STORE_DIR", str(tmp_path / "store"))
+
+
+@pytest.mark.parametrize("engine", ["pyarrow", "c"])
+@pytest.mark.parametrize("text", ["", "\n", ",".join(COLUMNS) + "\n"],
+                         ids=["empty", "blank", "header_only"])
+def test_log_without_trades_loads_empty(tmp_path, monkeypatch, text, engine):
+    if engine == "pyarrow":
+        pytest.importorskip("pyarrow")
+    monkeypatch.setattr(analytics, "CSV_ENGINE", engine)
+    path = tmp_path / "check_strategy_trades_2025.csv"
+    path.write_text(text)
+    trades = analytics.load_trades(str(path))
+    assert len(trades) == 0
+    assert list(trades.columns) == COLUMNS
+    assert analytics.report(trades)["summary"]["Max Concurrent"] == 0
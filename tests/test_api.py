@@ -0,0 +1,38 @@
+import json
+import threading
+import urllib.error
+import urllib.request
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+import api
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), api.Handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def _get(url):
+    try:
+        with urllib.request.urlopen(url, timeout=5) as r:
+            return r.status, json.loads(r.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+def test_api_error_keeps_its_status(server):
+    assert _get(f"{server}/nowhere") == (404, {"error": "no route /nowhere"})
+
+
+def test_unexpected_failure_answers_500(server, monkeypatch):
+    def broken(path, query):
+        raise OSError("store unreadable")
+    monkeypatch.setattr(api, "respond", broken)
+    assert _get(f"{server}/signals") == (500, {"error": "internal error"})
@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import pyramid
+import store
+
+
+@pytest.fixture(autouse=True)
+def scratch_store(tmp_path, monkeypatch):
+    monkeypatch.setattr(store, "STORE_DIR", str(tmp_path))
+
+
+def _bars(ticker, start, days):
+    dates = pd.bdate_range(start, periods=days)
+    price = np.linspace(10, 20, days)
+    return pd.DataFrame({"Date": dates, "Open": price, "High": price * 1.01, "Low": price * 0.99,
+                         "Close": price, "Adj Close": price, "Volume": 1000.0, "Ticker": ticker})
+
+
+def _check(df, tf):
+    level = pyramid.get(tf).reset_index(drop=True)
+    expected = pyramid.aggregate(df, tf).reset_index(drop=True)
+    pd.testing.assert_frame_equal(level[expected.columns], expected, check_dtype=False)
+
+
+@pytest.mark.parametrize("tf", ["2d", "1w", "1mo"])
+def test_level_follows_appended_bars(tf):
+    df = pd.concat([_bars("AAA", "2024-01-01", 300), _bars("BBB", "2024-01-01", 300)], ignore_index=True)
+    store.save("daily_data", df.groupby("Ticker").head(290).reset_index(drop=True))
+    pyramid.get(tf)
+    store.save("daily_data", df)
+    _check(df, tf)
+
+
+@pytest.mark.parametrize("tf", ["2d", "1w", "1mo"])
+def test_level_rebuilds_restated_ticker(tf):
+    df = pd.concat([_bars("AAA", "2024-01-01", 300), _bars("BBB", "2024-01-01", 300)], ignore_index=True)
+    store.save("daily_data", df)
+    pyramid.get(tf)
+    # a 2:1 split restates AAA's early prices without touching a timestamp
+    split = df.copy()
+    early = (split["Ticker"] == "AAA") & (split["Date"] < "2024-06-01")
+    split.loc[early, ["Open", "High", "Low", "Close", "Adj Close"]] /= 2
+    store.save("daily_data", split)
+    _check(split, tf)
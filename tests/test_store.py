@@ -0,0 +1,39 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import store
+
+
+@pytest.fixture(autouse=True)
+def scratch_store(tmp_path, monkeypatch):
+    monkeypatch.setattr(store, "STORE_DIR", str(tmp_path))
+
+
+def _bars(ticker, start, days):
+    dates = pd.date_range(start, periods=days, freq="D")
+    price = np.linspace(10, 20, days)
+    return pd.DataFrame({"Date": dates, "Open": price, "High": price, "Low": price,
+                         "Close": price, "Adj Close": price, "Volume": 1000.0,
+                         "Ticker": ticker, "Index": "SP500"})
+
+
+def test_append_rows_replaces_resent_bars():
+    store.append_rows("daily_data", _bars("AAA", "2025-01-01", 10), "Date")
+    resent = _bars("AAA", "2025-01-08", 5).assign(Close=99.0)
+    out = store.append_rows("daily_data", resent, "Date")
+    assert len(out) == 12
+    assert (out["Close"].to_numpy()[-5:] == 99.0).all()
+
+
+def test_append_rows_trims_each_ticker_to_period():
+    first = pd.concat([_bars("AAA", "2025-01-01", 30), _bars("BBB", "2025-01-01", 20)])
+    store.append_rows("daily_data", first, "Date", period="30d")
+    top_up = _bars("AAA", "2025-01-31", 10)
+    out = store.append_rows("daily_data", top_up, "Date", period="30d")
+
+    aaa = out[out["Ticker"] == "AAA"]
+    assert len(aaa) == 31   # 30 days before the latest bar, plus the latest bar itself
+    assert aaa["ts"].max() - aaa["ts"].min() == pd.Timedelta(days=30).value
+    # a ticker without new bars keeps the window of its own latest bar
+    assert len(out[out["Ticker"] == "BBB"]) == 20
@@ -128,15 +128,11 @@ def get_eurostoxx50_universe():
 # ==========================================================
 # 2. HOURLY DOWNLOADER (60 days, batched)
 # ==========================================================
-def download_hourly_prices(tickers, label, period="60d"):
-    print(f"\nDownloading {label}: {len(tickers)} tickers")
-    if not tickers:
-        return []
-
-    batch_size = 40
-    frames = []
-    failed = []
-
+def iter_hourly_batches(tickers, label, period="60d", batch_size=40):
+    """
+    Yield (frames, failed) for each batch of `batch_size` tickers as soon
+    as that batch has downloaded and parsed.
+    """
     for i in range(0, len(tickers), batch_size):
         batch = tickers[i:i + batch_size]
         print(f"  Batch {i // batch_size + 1}: {len(batch)} tickers")
@@ -152,18 +148,31 @@ def download_hourly_prices(tickers, label, period="60d"):
             )
         except Exception as e:
             print(f"  ERROR downloading batch: {e}")
-            failed.extend(batch)
+            yield [], list(batch)
             continue
 
+        frames = []
+        failed = []
         for t in batch:
             try:
-                df_t = data[t].dropna().copy()
-                df_t["Ticker"] = t
-                df_t["Index"] = label
-                frames.append(df_t.reset_index())
+                # copy-on-write: no per-ticker copy until a column is written
+                frames.append(data[t].dropna().reset_index().assign(Ticker=t, Index=label))
             except Exception as e:
                 print(f"  Failed to parse {t}: {e}")
                 failed.append(t)
+        yield frames, failed
+
+
+def download_hourly_prices(tickers, label, period="60d"):
+    print(f"\nDownloading {label}: {len(tickers)} tickers")
+    if not tickers:
+        return []
+
+    frames = []
+    failed = []
+    for batch_frames, batch_failed in iter_hourly_batches(tickers, label, period):
+        frames.extend(batch_frames)
+        failed.extend(batch_failed)
 
     print(f"Completed {label}: {len(frames)} OK, {len(failed)} failed")
     return frames